@@ -1,16 +1,18 @@
 from django.contrib import admin
 from django.urls import path
 from django.template.response import TemplateResponse
-from django.db.models.functions import TruncMonth
-from django.db.models import Count
 from django.utils.timezone import now
 from datetime import timedelta
 
 from django.contrib.admin.views.decorators import staff_member_required
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
-from django.contrib.auth.models import User
 from django.utils.html import format_html
+from django.contrib import messages
+
+from . import exports, labels, live, rollups
+from .admin_large import LargeTableAdminMixin
+from .barcodes import barcode_path
 
 # Import all models, including the new 'Address' model
 from .models import (
@@ -19,7 +21,8 @@ from .models import (
     ArtificialPlant, BusinessProfile, BuyingDetail,
     AboutPage, ContactMessage, HeroSlide, ProductCategory, Event,
     SubscribeSection, FooterLink, SocialLink, SiteSettings,
-    Order, OrderItem, Invoice, Address  # <-- Added Order, OrderItem, Invoice, Address
+    Order, OrderItem, Invoice, Address,  # <-- Added Order, OrderItem, Invoice, Address
+    CatalogEntry,
 )
 
 # =============================
@@ -47,10 +50,59 @@ class ProductImageInline(admin.TabularInline):
     extra = 1
     max_num = 10
 
+# Label sheets from the admin render inside a web request, so they stay small
+# and use at most a couple of processes; the label_sheets command handles
+# larger runs.
+ADMIN_LABEL_LIMIT = 480  # 20 pages at the default 3x8 layout
+ADMIN_LABEL_WORKERS = 2
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ('name', 'category', 'price')
     inlines = [ProductImageInline]
+    actions = ['print_label_sheet_pdf', 'print_label_sheet_png']
+
+    def _label_sheet(self, request, queryset, fmt):
+        count = queryset.count()
+        if count > ADMIN_LABEL_LIMIT:
+            self.message_user(
+                request,
+                f"{count} products selected; label sheets from the admin are limited to "
+                f"{ADMIN_LABEL_LIMIT}. Run `python manage.py label_sheets labels.{fmt} --category ...` "
+                f"(or --ids ...) on the server for larger runs.",
+                messages.WARNING,
+            )
+            return None
+        layout = labels.SheetLayout()
+        pages = -(-count // layout.per_page)
+        stream, content_type, filename = labels.FORMATS[fmt]
+        response = StreamingHttpResponse(
+            stream(
+                labels.labels_for(queryset), layout, BarcodeSettings.current_type(),
+                max(1, min(ADMIN_LABEL_WORKERS, pages)),
+            ),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @admin.action(description="Print barcode label sheet (PDF)")
+    def print_label_sheet_pdf(self, request, queryset):
+        return self._label_sheet(request, queryset, 'pdf')
+
+    @admin.action(description="Print barcode label sheet (PNG pages, zipped)")
+    def print_label_sheet_png(self, request, queryset):
+        return self._label_sheet(request, queryset, 'zip')
+
+@admin.register(CatalogEntry)
+class CatalogEntryAdmin(admin.ModelAdmin):
+    list_display = ('title', 'kind', 'category', 'price', 'updated_at')
+    list_filter = ('kind',)
+    search_fields = ('title',)
+    readonly_fields = ('kind', 'object_id', 'title', 'description', 'category', 'price', 'image', 'updated_at')
+
+    def has_add_permission(self, request):
+        return False
 
 @admin.register(ProductCategory)
 class ProductCategoryAdmin(admin.ModelAdmin):
@@ -59,21 +111,62 @@ class ProductCategoryAdmin(admin.ModelAdmin):
 @admin.register(BarcodeSettings)
 class BarcodeSettingsAdmin(admin.ModelAdmin):
     list_display = ('barcode_type',)
+    actions = ['check_product_barcodes']
+
+    @admin.action(description="Check which product barcodes need regenerating")
+    def check_product_barcodes(self, request, queryset):
+        # Re-rendering the catalog runs a process pool for minutes, so it is
+        # left to the management command rather than an admin request.
+        barcode_type = BarcodeSettings.current_type()
+        outdated = sum(
+            1 for code, image in Product.objects.exclude(code__isnull=True).exclude(code='')
+            .values_list('code', 'barcode_image').iterator()
+            if image != barcode_path(code, barcode_type)
+        )
+        if not outdated:
+            self.message_user(request, f"Every product barcode is already rendered as {barcode_type}.")
+            return
+        self.message_user(
+            request,
+            f"{outdated} products need their barcode re-rendered as {barcode_type}. "
+            f"Run `python manage.py regenerate_barcodes` on the server to do it.",
+            messages.WARNING,
+        )
 
 # =============================
 # Order & Transaction Admin
 # =============================
+class ExportActionsMixin:
+    """Stream the selected rows as gzip-compressed CSV or JSONL (see core/exports.py)."""
+    export_kind = None
+    actions = ['export_csv', 'export_jsonl']
+
+    @admin.action(description="Export selected as CSV (gzip)")
+    def export_csv(self, request, queryset):
+        return exports.export_response(self.export_kind, queryset, 'csv')
+
+    @admin.action(description="Export selected as JSONL (gzip)")
+    def export_jsonl(self, request, queryset):
+        return exports.export_response(self.export_kind, queryset, 'jsonl')
+
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     readonly_fields = ('product', 'quantity', 'total_price')
     extra = 0
     can_delete = False
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
+
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdminMixin, ExportActionsMixin, admin.ModelAdmin):
+    export_kind = 'orders'
     list_display = ('id', 'user', 'delivery_address', 'status', 'created_at')
+    list_select_related = ('user', 'delivery_address')
     list_filter = ('status', 'created_at')
-    search_fields = ('user__username', 'delivery_address__full_name')
+    search_fields = ('id', 'user__username')
+    search_help_text = "Order id, or the start of a username."
+    prefix_search_fields = ('user__username',)
     inlines = [OrderItemInline]
     readonly_fields = ('user', 'delivery_address', 'created_at')
 
@@ -81,27 +174,39 @@ class OrderAdmin(admin.ModelAdmin):
         return False
 
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
+class OrderItemAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('order', 'product', 'quantity', 'total_price')
-    search_fields = ('order__id', 'product__name')
+    list_select_related = ('order__user', 'product')
+    search_fields = ('order__id',)
+    search_help_text = "Order id."
+    id_search_fields = ('order_id',)
     readonly_fields = ('order', 'product', 'quantity')
 
     def has_add_permission(self, request):
         return False
 
 @admin.register(Invoice)
-class InvoiceAdmin(admin.ModelAdmin):
+class InvoiceAdmin(LargeTableAdminMixin, ExportActionsMixin, admin.ModelAdmin):
+    export_kind = 'invoices'
     list_display = ('invoice_number', 'order', 'billing_address', 'total_amount', 'billing_date')
-    search_fields = ('invoice_number', 'order__id', 'billing_address__full_name')
+    list_select_related = ('order__user', 'billing_address')
+    search_fields = ('invoice_number', 'order__id')
+    search_help_text = "Order id, or the start of an invoice number."
+    id_search_fields = ('order_id',)
+    prefix_search_fields = ('invoice_number',)
     readonly_fields = ('invoice_number', 'order', 'billing_address', 'total_amount', 'tax', 'billing_date')
     
     def has_add_permission(self, request):
         return False
 
 @admin.register(Address)
-class AddressAdmin(admin.ModelAdmin):
+class AddressAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'full_name', 'phone_number', 'city', 'pincode')
-    search_fields = ('user__username', 'full_name', 'phone_number')
+    list_select_related = ('user',)
+    search_fields = ('id', 'user__username')
+    search_help_text = "Address id, or the start of a username."
+    prefix_search_fields = ('user__username',)
+    autocomplete_fields = ('user',)
 
 # =============================
 # Other Admin Configurations
@@ -164,9 +269,15 @@ class HeroSlideAdmin(admin.ModelAdmin):
     search_fields = ('headline', 'subtext')
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(LargeTableAdminMixin, ExportActionsMixin, admin.ModelAdmin):
+    export_kind = 'payments'
     list_display = ('id', 'user', 'order', 'amount', 'status', 'created_at')
-    search_fields = ('user__username', 'razorpay_payment_id', 'razorpay_order_id')
+    list_select_related = ('user', 'order__user')
+    search_fields = ('id', 'user__username', 'razorpay_payment_id', 'razorpay_order_id')
+    search_help_text = "Payment or order id, or the start of a username or Razorpay id."
+    id_search_fields = ('pk', 'order_id')
+    prefix_search_fields = ('user__username', 'razorpay_payment_id', 'razorpay_order_id')
+    raw_id_fields = ('user', 'order')
     readonly_fields = ('raw_response',)
 
 # =============================
@@ -185,46 +296,27 @@ class CustomAdminSite(admin.AdminSite):
         return custom_urls + urls
 
     def custom_index(self, request, extra_context=None):
-        # Using the correct models for data
-        total_selling = SellingDetail.objects.count()
-        total_buying = BuyingDetail.objects.count()
-        total_payments = Payment.objects.count()
-        total_orders = Order.objects.count()
+        # Counts and charts come from the daily rollups (core/rollups.py).
+        totals = rollups.totals()
 
-        latest_selling = SellingDetail.objects.order_by('-sold_on')[:5]
-        latest_buying = BuyingDetail.objects.order_by('-bought_on')[:5]
-        latest_payments = Payment.objects.order_by('-created_at')[:5]
-        latest_orders = Order.objects.order_by('-created_at')[:5]
+        latest_selling = SellingDetail.objects.order_by('-id')[:5]
+        latest_buying = BuyingDetail.objects.order_by('-id')[:5]
+        latest_payments = Payment.objects.order_by('-id')[:5]
+        latest_orders = Order.objects.order_by('-id')[:5]
 
         today = now().date()
         months = [(today.replace(day=1) - timedelta(days=i * 30)).strftime("%b %Y") for i in range(5, -1, -1)]
-
-        selling_data_qs = (
-            SellingDetail.objects
-            .annotate(month=TruncMonth('sold_on'))
-            .values('month')
-            .annotate(count=Count('id'))
-            .order_by('month')
-        )
-        selling_data = {item['month'].strftime("%b %Y"): item['count'] for item in selling_data_qs}
-        selling_counts = [selling_data.get(month, 0) for month in months]
-
-        order_data_qs = (
-            Order.objects
-            .annotate(month=TruncMonth('created_at'))
-            .values('month')
-            .annotate(count=Count('id'))
-            .order_by('month')
-        )
-        order_data = {item['month'].strftime("%b %Y"): item['count'] for item in order_data_qs}
-        order_counts = [order_data.get(month, 0) for month in months]
+        since = (today.replace(day=1) - timedelta(days=5 * 30)).replace(day=1)
+        series = rollups.monthly(['sales', 'orders'], since)
+        selling_counts = [series['sales'].get(month, 0) for month in months]
+        order_counts = [series['orders'].get(month, 0) for month in months]
 
         context = {
             **(extra_context or {}),
-            'total_selling': total_selling,
-            'total_buying': total_buying,
-            'total_payments': total_payments,
-            'total_orders': total_orders,
+            'total_selling': totals['sales'],
+            'total_buying': totals['purchases'],
+            'total_payments': totals['payments'],
+            'total_orders': totals['orders'],
             'months': months,
             'selling_counts': selling_counts,
             'order_counts': order_counts,
@@ -251,9 +343,10 @@ custom_admin_site.register(Address)
 # =============================
 @staff_member_required
 def admin_dashboard(request):
+    totals = rollups.totals()
     product_count = Product.objects.count()
-    selling_count = SellingDetail.objects.count()
-    payment_count = Payment.objects.count()
+    selling_count = totals['sales']
+    payment_count = totals['payments']
 
     context = {
         'product_count': product_count,
@@ -264,10 +357,5 @@ def admin_dashboard(request):
 
 @staff_member_required
 def dashboard_data(request):
-    data = {
-        "total_products": Product.objects.count(),
-        "total_sells": SellingDetail.objects.count(),
-        "total_users": User.objects.count(),
-        "total_payments": Payment.objects.count(),
-    }
-    return JsonResponse(data)
\ No newline at end of file
+    # Polling fallback for the SSE stream at admin_views.dashboard_stream.
+    return JsonResponse(live.counters())
@@ -1,21 +1,26 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
-from django.db.models import Count
-from django.db.models.functions import TruncDate
-from core.models import Product, SellingDetail, Payment
+from django.db.models import F
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from core import analytics, live, rollups
+from core.models import DailyRollup, Product
 from django.contrib.auth.models import User
 
 def admin_dashboard(request):
     product_count = Product.objects.count()
     user_count = User.objects.count()
-    sell_counts = SellingDetail.objects.annotate(
-        day=TruncDate('sold_on')
-    ).values('day').annotate(
-        total=Count('id')
-    ).order_by('day')
-
-    print("Sell counts:", list(sell_counts))  # Add this debug line
+    sell_counts = (
+        DailyRollup.objects
+        .filter(sales__gt=0)
+        .values('day')
+        .annotate(total=F('sales'))
+        .order_by('day')
+    )
 
-    payment_count = Payment.objects.count()
+    payment_count = rollups.totals()['payments']
 
     context = {
         "product_count": product_count,
@@ -24,3 +29,52 @@ def admin_dashboard(request):
         "payment_count": payment_count,
     }
     return render(request, "admin_dashboard.html", context)
+
+
+async def dashboard_stream(request):
+    """Server-Sent Events feed of dashboard counters and new orders (ASGI only)."""
+    is_staff = await sync_to_async(lambda: request.user.is_staff)()
+    if not is_staff:
+        return HttpResponseForbidden()
+    if not hasattr(request, 'scope'):
+        # Under WSGI the stream would pin a worker; 204 tells EventSource to stop retrying.
+        return HttpResponse(status=204)
+
+    async def events():
+        queue = live.broker.subscribe()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + live.STREAM_SECONDS
+        try:
+            if live.broker.snapshot is None:
+                live.broker.snapshot = await sync_to_async(live.counters)()
+            yield f'retry: {live.RETRY_MS}\n\n'
+            yield live.format_event('counters', live.broker.snapshot)
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), min(live.KEEPALIVE_SECONDS, remaining))
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield live.format_event(event, data)
+        finally:
+            live.broker.unsubscribe(queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@staff_member_required
+def analytics_view(request):
+    context = {"available": analytics.available()}
+    if context["available"]:
+        context["report"] = analytics.report(refresh='refresh' in request.GET)
+    return render(request, "admin/analytics.html", context)
+
+
+@staff_member_required
+def analytics_data(request):
+    if not analytics.available():
+        return JsonResponse({"error": "NumPy is not installed"}, status=503)
+    return JsonResponse(analytics.report(refresh='refresh' in request.GET))
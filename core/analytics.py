@@ -0,0 +1,214 @@
+from array import array
+from datetime import date
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import OrderItem, Payment, Product, ProductCategory
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, see available()
+    np = None
+
+
+# ======================
+# SALES ANALYTICS
+# ======================
+# Paid order history is streamed column by column with
+# values_list().iterator() into NumPy arrays, and every report is a
+# vectorised group-by over them (np.unique + np.bincount): one pass over the
+# rows instead of a query or Python loop per product, order or customer.
+# Results are cached until the end of the day.
+
+CHUNK_SIZE = 5000
+CACHE_KEY = 'core.analytics:{day}'
+CACHE_TIMEOUT = 60 * 60 * 24
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+TOP_PRODUCTS = 20
+MAX_BASKET = 20
+COHORT_MONTHS = 12
+
+# (segment, test on recency score r and frequency score f); first match wins.
+RFM_SEGMENTS = (
+    ('Champions', lambda r, f: (r >= 4) & (f >= 4)),
+    ('Loyal', lambda r, f: (r >= 3) & (f >= 3)),
+    ('New', lambda r, f: (r >= 4) & (f <= 1)),
+    ('At risk', lambda r, f: (r <= 2) & (f >= 3)),
+    ('Hibernating', lambda r, f: (r <= 2) & (f <= 2)),
+)
+RFM_DEFAULT_SEGMENT = 'Needs attention'
+
+
+def available():
+    return np is not None
+
+
+def _epoch_day(value):
+    return timezone.localdate(value).toordinal() - EPOCH_ORDINAL
+
+
+def _columns(queryset, fields, typecodes, converters=None):
+    """Stream `fields` of `queryset` into one NumPy array per column."""
+    converters = converters or {}
+    columns = [array(code) for code in typecodes]
+    appends = [column.append for column in columns]
+    convert = [converters.get(i) for i in range(len(fields))]
+    for row in queryset.values_list(*fields).iterator(chunk_size=CHUNK_SIZE):
+        for append, fn, value in zip(appends, convert, row):
+            append(fn(value) if fn else value)
+    return [np.array(column, dtype=column.typecode) for column in columns]
+
+
+def load_items():
+    """Columns (order, product, category, quantity, unit price) of paid orders' items."""
+    return _columns(
+        OrderItem.objects.filter(order__status='paid'),
+        ('order_id', 'product_id', 'product__category_id', 'quantity', 'product__price'),
+        ('q', 'q', 'q', 'q', 'd'),
+    )
+
+
+def load_payments():
+    """Columns (user, day since epoch, amount) of paid payments."""
+    return _columns(
+        Payment.objects.filter(status='paid', user__isnull=False),
+        ('user_id', 'created_at', 'amount'),
+        ('q', 'q', 'd'),
+        converters={1: _epoch_day},
+    )
+
+
+def _group_sum(keys, weights):
+    """Return (unique keys, sum of weights per key)."""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.bincount(inverse, weights=weights, minlength=len(unique))
+
+
+def _ranked(keys, totals, names, limit=None):
+    order = np.argsort(totals)[::-1][:limit]
+    return [
+        {'id': int(keys[i]), 'name': names.get(int(keys[i]), f'#{keys[i]}'), 'revenue': round(float(totals[i]), 2)}
+        for i in order
+    ]
+
+
+def revenue(product, category, quantity, price):
+    line_total = quantity * price
+    products, by_product = _group_sum(product, line_total)
+    categories, by_category = _group_sum(category, line_total)
+    top = products[np.argsort(by_product)[::-1][:TOP_PRODUCTS]].tolist()
+    return {
+        'total': round(float(line_total.sum()), 2),
+        'by_product': _ranked(
+            products, by_product,
+            dict(Product.objects.filter(id__in=top).values_list('id', 'name')), TOP_PRODUCTS,
+        ),
+        'by_category': _ranked(
+            categories, by_category, dict(ProductCategory.objects.values_list('id', 'name')),
+        ),
+    }
+
+
+def basket_sizes(order, quantity):
+    """Units per paid order: summary plus histogram[i] = orders with i + 1 units."""
+    if not len(order):
+        return {'orders': 0, 'mean': 0, 'median': 0, 'histogram': []}
+    _, units = _group_sum(order, quantity)
+    units = units.astype(np.int64)
+    # The last bucket collects every basket of MAX_BASKET units or more.
+    histogram = np.bincount(np.clip(units, 1, MAX_BASKET), minlength=MAX_BASKET + 1)[1:]
+    return {
+        'orders': int(len(units)),
+        'mean': round(float(units.mean()), 2),
+        'median': float(np.median(units)),
+        'histogram': histogram.tolist(),
+    }
+
+
+def cohorts(user, day, months=COHORT_MONTHS):
+    """Share of each first-purchase month's customers buying again N months later."""
+    if not len(user):
+        return {'offsets': list(range(months)), 'rows': []}
+    month = day.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    users, inverse = np.unique(user, return_inverse=True)
+    first = np.full(len(users), np.iinfo(np.int64).max)
+    np.minimum.at(first, inverse, month)
+    cohort = first[inverse]
+    offset = month - cohort
+
+    # Count each customer once per (cohort, offset) cell.
+    keep = offset < months
+    cells = np.unique(np.stack([inverse[keep], cohort[keep], offset[keep]]), axis=1)
+    cohort_ids, row = np.unique(cells[1], return_inverse=True)
+    matrix = np.zeros((len(cohort_ids), months), dtype=np.int64)
+    np.add.at(matrix, (row, cells[2]), 1)
+
+    rows = []
+    for cohort_month, counts in zip(cohort_ids[-months:], matrix[-months:]):
+        size = int(counts[0])
+        rows.append({
+            'cohort': str(np.datetime64(int(cohort_month), 'M')),
+            'customers': size,
+            'retention': [round(100 * int(c) / size, 1) for c in counts],
+        })
+    return {'offsets': list(range(months)), 'rows': rows}
+
+
+def _quintiles(values):
+    """Score values 1-5 by quintile, higher values scoring higher."""
+    edges = np.quantile(values, [0.2, 0.4, 0.6, 0.8])
+    return np.digitize(values, edges, right=True) + 1
+
+
+def rfm(user, day, amount, today):
+    """Customer counts and average spend per recency/frequency segment."""
+    if not len(user):
+        return []
+    users, inverse = np.unique(user, return_inverse=True)
+    last = np.zeros(len(users), dtype=np.int64)
+    np.maximum.at(last, inverse, day)
+    frequency = np.bincount(inverse, minlength=len(users))
+    monetary = np.bincount(inverse, weights=amount, minlength=len(users))
+
+    # Fewer days since the last purchase is better.
+    r = 6 - _quintiles(today.toordinal() - EPOCH_ORDINAL - last)
+    f = _quintiles(frequency)
+    segment = np.full(len(users), len(RFM_SEGMENTS))
+    for i, (_, test) in reversed(list(enumerate(RFM_SEGMENTS))):
+        segment[test(r, f)] = i
+
+    names = [name for name, _ in RFM_SEGMENTS] + [RFM_DEFAULT_SEGMENT]
+    counts = np.bincount(segment, minlength=len(names))
+    spend = np.bincount(segment, weights=monetary, minlength=len(names))
+    return [
+        {
+            'segment': name,
+            'customers': int(counts[i]),
+            'avg_spend': round(float(spend[i] / counts[i]), 2) if counts[i] else 0,
+        }
+        for i, name in enumerate(names)
+    ]
+
+
+def compute(today):
+    order, product, category, quantity, price = load_items()
+    user, day, amount = load_payments()
+    return {
+        'date': today.isoformat(),
+        'revenue': revenue(product, category, quantity, price),
+        'basket_sizes': basket_sizes(order, quantity),
+        'cohorts': cohorts(user, day),
+        'rfm': rfm(user, day, amount, today),
+    }
+
+
+def report(refresh=False):
+    """Return today's analytics, computed at most once per day unless `refresh`."""
+    today = timezone.localdate()
+    key = CACHE_KEY.format(day=today.isoformat())
+    result = None if refresh else cache.get(key)
+    if result is None:
+        result = compute(today)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
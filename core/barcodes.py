@@ -0,0 +1,177 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+import barcode
+import qrcode
+import qrcode.image.svg
+from barcode.writer import ImageWriter, SVGWriter
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+
+# ======================
+# BARCODE RENDERING
+# ======================
+# A product's barcode image is fully determined by (code, barcode_type), so
+# it lives at a deterministic path and is only rendered when that file is
+# missing. Saves that don't touch the code (price edits, bulk updates) never
+# reach Pillow.
+
+BARCODE_DIR = 'barcodes'
+DEFAULT_BARCODE_TYPE = 'code128'
+
+
+def barcode_path(code, barcode_type):
+    return f'{BARCODE_DIR}/{barcode_type}/{code}.png'
+
+
+def render_png(code, barcode_type):
+    buffer = BytesIO()
+    if barcode_type == 'qrcode':
+        img = qrcode.make(code)
+        img.save(buffer, format='PNG')
+    else:
+        bc_class = barcode.get_barcode_class(barcode_type)
+        bc = bc_class(code, writer=ImageWriter())
+        bc.write(buffer)
+    return buffer.getvalue()
+
+
+def render_svg(code, barcode_type):
+    buffer = BytesIO()
+    if barcode_type == 'qrcode':
+        img = qrcode.make(code, image_factory=qrcode.image.svg.SvgPathImage)
+        img.save(buffer)
+    else:
+        bc_class = barcode.get_barcode_class(barcode_type)
+        bc = bc_class(code, writer=SVGWriter())
+        bc.write(buffer)
+    return buffer.getvalue()
+
+
+RENDERERS = {
+    'png': (render_png, 'image/png'),
+    'svg': (render_svg, 'image/svg+xml'),
+}
+
+
+@lru_cache(maxsize=512)
+def render_cached(code, barcode_type, fmt):
+    """Return (bytes, content type, etag) for a barcode, memoized per process.
+
+    Output depends only on the arguments, so entries never go stale.
+    """
+    render, content_type = RENDERERS[fmt]
+    data = render(code, barcode_type)
+    etag = '"%s"' % hashlib.sha1(data).hexdigest()
+    return data, content_type, etag
+
+
+def _raw(storage):
+    # Barcode files keep their deterministic names rather than a content hash.
+    return getattr(storage, 'raw', storage)
+
+
+def _write_atomic(storage, name, data):
+    try:
+        full_path = storage.path(name)
+    except NotImplementedError:
+        storage.save(name, ContentFile(data))
+        return
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    tmp_path = f'{full_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    # Readers never see a half-written PNG, even if the process dies here.
+    os.replace(tmp_path, full_path)
+
+
+def ensure_barcode(code, barcode_type, storage=default_storage):
+    """Return the storage name of the barcode PNG, rendering it only if missing."""
+    storage = _raw(storage)
+    name = barcode_path(code, barcode_type)
+    if not storage.exists(name):
+        _write_atomic(storage, name, render_png(code, barcode_type))
+    return name
+
+
+def delete_if_unreferenced(name, storage=default_storage):
+    """Remove a barcode file once no Product points at it."""
+    from .models import Product
+    if not name or Product.objects.filter(barcode_image=name).exists():
+        return False
+    storage = _raw(storage)
+    if storage.exists(name):
+        storage.delete(name)
+        return True
+    return False
+
+
+# ======================
+# BULK REGENERATION
+# ======================
+def render_job(args):
+    """Process-pool job: render one (code, barcode_type) and return
+    (code, storage name or None, error message or None)."""
+    code, barcode_type = args
+    try:
+        return code, ensure_barcode(code, barcode_type), None
+    except Exception as e:
+        return code, None, str(e)
+
+
+def regenerate_all(barcode_type, workers=None, chunk_size=500, progress=None):
+    """Bring every Product's barcode_image up to `barcode_type`.
+
+    Rendering runs in a process pool; rows are updated with bulk_update one
+    chunk at a time. Products already pointing at the right file are
+    skipped, so an interrupted run resumes where it stopped.
+    Returns (updated, failed, stale file names).
+    """
+    from .models import Product
+
+    updated = failed = 0
+    stale = set()
+    pending = (
+        Product.objects.only('id', 'code', 'barcode_image')
+        .exclude(code__isnull=True).exclude(code='')
+        .order_by('id')
+    )
+
+    def flush(chunk, pool):
+        nonlocal updated, failed
+        results = pool.map(render_job, [(p.code, barcode_type) for p in chunk])
+        done = []
+        for product, (_, name, error) in zip(chunk, results):
+            if error:
+                failed += 1
+                if progress:
+                    progress(f"  {product.code}: {error}")
+                continue
+            if product.barcode_image.name:
+                stale.add(product.barcode_image.name)
+            product.barcode_image.name = name
+            done.append(product)
+        Product.objects.bulk_update(done, ['barcode_image'])
+        updated += len(done)
+        if progress:
+            progress(f"  {updated} updated, {failed} failed (last id {chunk[-1].id})")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Each chunk is fetched in full (keyset on id) before bulk_update
+        # writes to the table; an open iterator() cursor over Product would
+        # see its own updates on SQLite.
+        last_id = 0
+        while True:
+            rows = list(pending.filter(id__gt=last_id)[:chunk_size])
+            if not rows:
+                break
+            last_id = rows[-1].id
+            chunk = [p for p in rows if p.barcode_image.name != barcode_path(p.code, barcode_type)]
+            if chunk:
+                flush(chunk, pool)
+
+    return updated, failed, stale
@@ -0,0 +1,98 @@
+import time
+
+from django.core.cache import cache
+
+
+# ======================
+# MODEL VERSION COUNTERS
+# ======================
+# Every cached fragment is keyed by the version counters of the models it
+# renders. Saving or deleting a row bumps its model's counter (see
+# core/signals.py), so the next render misses and stale entries simply expire.
+
+VERSION_KEY_PREFIX = 'model-version'
+
+# Fragment name -> model labels the fragment depends on.
+HOME_FRAGMENTS = {
+    'nav': ('core.navlink',),
+    'hero': ('core.heroslide',),
+    'products': ('core.product', 'core.productcategory'),
+    'secondary_hero': ('core.secondaryhero',),
+    'events': ('core.event',),
+    'footer': ('core.footer',),
+}
+
+
+def _version_key(label):
+    return f'{VERSION_KEY_PREFIX}:{label}'
+
+
+def _fresh_version():
+    # Seeded from the clock rather than 1, so a counter that was evicted
+    # can never come back at a value an old fragment was stored under.
+    return time.time_ns()
+
+
+def get_versions(labels):
+    """Return {label: version} for the given model labels in one cache round-trip."""
+    keys = {_version_key(label): label for label in labels}
+    found = cache.get_many(keys)
+    versions = {}
+    for key, label in keys.items():
+        if key not in found:
+            cache.add(key, _fresh_version(), None)
+            found[key] = cache.get(key)
+        versions[label] = found[key]
+    return versions
+
+
+def bump_version(label):
+    # A plain set of a new value rather than incr(): FileBasedCache.incr is a
+    # read-modify-write, so two concurrent bumps could both land on the same
+    # number and a worker that refreshed in between would miss the second.
+    version = _fresh_version()
+    cache.set(_version_key(label), version, None)
+    return version
+
+
+def fragment_versions(fragments=HOME_FRAGMENTS):
+    """Return {fragment_name: version string} for use as {% cache %} vary_on keys."""
+    labels = {label for deps in fragments.values() for label in deps}
+    versions = get_versions(labels)
+    return {
+        name: '-'.join(str(versions[label]) for label in deps)
+        for name, deps in fragments.items()
+    }
+
+
+# ======================
+# PROCESS-LOCAL MEMOIZATION
+# ======================
+# Singleton and near-static tables read by context processors on every
+# render. Each worker keeps the materialized rows in memory and only checks
+# the shared version counter, so an admin save is picked up by all workers
+# on their next request.
+
+MEMOIZED_MODELS = (
+    'core.sitesettings',
+    'core.navbarlogo',
+    'core.navbarmenuitem',
+    'core.barcodesettings',
+)
+
+_memo = {}
+
+
+def memoized(label, loader):
+    """Return loader()'s result, reloading only when `label`'s version changes."""
+    version = get_versions([label])[label]
+    entry = _memo.get(label)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    value = loader()
+    _memo[label] = (version, value)
+    return value
+
+
+def clear_memo():
+    _memo.clear()
@@ -0,0 +1,345 @@
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils.module_loading import import_string
+
+from .models import CartItem, Order, OrderItem, Product
+
+
+# ======================
+# TOTALS
+# ======================
+# Cart and order totals are one SQL aggregate over the lines instead of a
+# Python sum that lazy-loads each line's product.
+
+DELIVERY_CHARGE = Decimal('50')
+# Upper bound for one line's quantity; anything larger is clamped (or, from
+# the JSON endpoint, rejected) so totals and CartItem.quantity never overflow.
+MAX_LINE_QUANTITY = 99
+CENTS = Decimal('0.01')
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+LINE_TOTAL = ExpressionWrapper(F('quantity') * F('product__price'), output_field=MONEY)
+
+
+def _totals(subtotal, units):
+    subtotal = (subtotal or Decimal('0')).quantize(CENTS)
+    delivery_charge = DELIVERY_CHARGE if subtotal > 0 else Decimal('0')
+    return {
+        'subtotal': subtotal,
+        'delivery_charge': delivery_charge,
+        'grand_total': subtotal + delivery_charge,
+        'units': units or 0,
+    }
+
+
+def with_line_totals(lines):
+    """Annotate CartItem/OrderItem rows with `line_total` and load their products."""
+    return lines.select_related('product').annotate(line_total=LINE_TOTAL)
+
+
+def totals(lines):
+    """Subtotal, delivery charge, grand total and unit count of CartItem/OrderItem rows."""
+    sums = lines.aggregate(subtotal=Sum(LINE_TOTAL), units=Sum('quantity'))
+    return _totals(sums['subtotal'], sums['units'])
+
+
+def line_totals(lines):
+    """Same as totals() for CartLine objects whose products are already loaded."""
+    return _totals(sum((line.line_total for line in lines), Decimal('0')), sum(line.quantity for line in lines))
+
+
+def order_totals(order):
+    return totals(OrderItem.objects.filter(order=order))
+
+
+# ======================
+# CART BACKENDS
+# ======================
+# By default the working cart lives outside the database
+# (settings.CART_BACKEND), so browsing and clicking "add" never writes a
+# row. It is copied to CartItem only when the user logs in (merged with what
+# they saved before) and at checkout, where the pending order is built from
+# it. DatabaseCart instead keeps signed-in users' carts in CartItem.
+
+@dataclass
+class CartLine:
+    product: Product
+    quantity: int
+
+    @property
+    def line_total(self):
+        return self.product.price * self.quantity
+
+
+class BaseCart:
+    """A mapping of product id -> quantity tied to the current visitor."""
+
+    def __init__(self, request):
+        self.request = request
+
+    def lines(self):
+        raise NotImplementedError
+
+    def store(self, lines):
+        raise NotImplementedError
+
+    def add(self, product_id, quantity=1):
+        lines = self.lines()
+        lines[product_id] = min(lines.get(product_id, 0) + quantity, MAX_LINE_QUANTITY)
+        self.store(lines)
+        return lines[product_id]
+
+    def set(self, product_id, quantity):
+        quantity = min(quantity, MAX_LINE_QUANTITY)
+        lines = self.lines()
+        if quantity > 0:
+            lines[product_id] = quantity
+        else:
+            lines.pop(product_id, None)
+        self.store(lines)
+        return max(quantity, 0)
+
+    def decrement(self, product_id):
+        """Lower a line by one, never below one; return the new quantity (0 if absent)."""
+        quantity = self.lines().get(product_id, 0)
+        if quantity > 1:
+            return self.set(product_id, quantity - 1)
+        return quantity
+
+    def remove(self, product_id):
+        self.set(product_id, 0)
+
+    def logged_in(self, merged):
+        """Called by merge_at_login with the merged, already saved cart."""
+        self.store(merged)
+
+    def clear(self):
+        self.store({})
+
+    def count(self):
+        return sum(self.lines().values())
+
+    def items(self):
+        """CartLine objects in the order products were added (one query)."""
+        lines = self.lines()
+        products = Product.objects.in_bulk(list(lines))
+        return [CartLine(products[pid], quantity) for pid, quantity in lines.items() if pid in products]
+
+
+class SessionCart(BaseCart):
+    """Cart kept in the session itself; every change rewrites the session."""
+    session_key = 'cart'
+
+    def lines(self):
+        return {int(pid): quantity for pid, quantity in self.request.session.get(self.session_key, {}).items()}
+
+    def store(self, lines):
+        self.request.session[self.session_key] = {str(pid): quantity for pid, quantity in lines.items()}
+
+
+class CacheCart(BaseCart):
+    """Cart kept in the default cache under a random id remembered in the
+    session, so clicks never rewrite the session row (the default backend)."""
+    session_key = 'cart_id'
+    key_prefix = 'core.cart:'
+
+    def cache_key(self, create=False):
+        # Only store() mints an id, so merely viewing a page (or the badge
+        # fetching /cart/summary.json) never writes a session or sets a cookie.
+        session = self.request.session
+        if self.session_key not in session:
+            if not create:
+                return None
+            session[self.session_key] = uuid.uuid4().hex
+        return self.key_prefix + session[self.session_key]
+
+    def lines(self):
+        key = self.cache_key()
+        return dict(cache.get(key, {})) if key else {}
+
+    def store(self, lines):
+        if not lines and self.cache_key() is None:
+            return
+        cache.set(self.cache_key(create=True), lines, getattr(settings, 'CART_CACHE_TIMEOUT', 60 * 60 * 24 * 30))
+
+
+class DatabaseCart(SessionCart):
+    """Cart kept in CartItem for signed-in users (e.g. to share it across
+    devices); guests fall back to the session. Each mutation is a single
+    statement, so concurrent clicks never lose an update."""
+
+    def _user_id(self):
+        user = self.request.user
+        return user.pk if user.is_authenticated else None
+
+    def _rows(self):
+        return CartItem.objects.filter(user_id=self._user_id())
+
+    def lines(self):
+        if self._user_id() is None:
+            return super().lines()
+        return dict(self._rows().order_by('id').values_list('product_id', 'quantity'))
+
+    def store(self, lines):
+        if self._user_id() is None:
+            return super().store(lines)
+        persist(self.request.user, lines)
+
+    def add(self, product_id, quantity=1):
+        if self._user_id() is None:
+            return super().add(product_id, quantity)
+        return add_item(self._user_id(), product_id, quantity)
+
+    def set(self, product_id, quantity):
+        if self._user_id() is None:
+            return super().set(product_id, quantity)
+        quantity = min(quantity, MAX_LINE_QUANTITY)
+        if quantity > 0:
+            CartItem.objects.bulk_create(
+                [CartItem(user_id=self._user_id(), product_id=product_id, quantity=quantity)],
+                update_conflicts=True, unique_fields=['user', 'product'], update_fields=['quantity'],
+            )
+        else:
+            self._rows().filter(product_id=product_id).delete()
+        return max(quantity, 0)
+
+    def decrement(self, product_id):
+        if self._user_id() is None:
+            return super().decrement(product_id)
+        self._rows().filter(product_id=product_id, quantity__gt=1).update(quantity=F('quantity') - 1)
+        return self._rows().filter(product_id=product_id).values_list('quantity', flat=True).first() or 0
+
+    def clear(self):
+        if self._user_id() is None:
+            return super().clear()
+        self._rows().delete()
+
+    def logged_in(self, merged):
+        # CartItem is now the cart; drop the guest copy from the session.
+        self.request.session.pop(self.session_key, None)
+
+
+def get_cart(request):
+    if not hasattr(request, '_cart'):
+        backend = import_string(getattr(settings, 'CART_BACKEND', 'core.cart.CacheCart'))
+        request._cart = backend(request)
+    return request._cart
+
+
+def summary(request):
+    """Totals plus a compact line list, for the header badge and mini-cart."""
+    items = get_cart(request).items()
+    return {
+        **line_totals(items),
+        'items': [
+            {
+                'product_id': line.product.id,
+                'name': line.product.name,
+                'price': line.product.price,
+                'quantity': line.quantity,
+                'line_total': line.line_total,
+            }
+            for line in items
+        ],
+    }
+
+
+# ======================
+# PERSISTENCE
+# ======================
+def _apply(model, current, wanted, build):
+    """Bring `current` ({product id: row}) in line with `wanted` ({product id: quantity})
+    using at most one delete, one bulk_update and one bulk_create."""
+    to_delete = [row.pk for pid, row in current.items() if pid not in wanted]
+    to_update = []
+    for pid, row in current.items():
+        if pid in wanted and row.quantity != wanted[pid]:
+            row.quantity = wanted[pid]
+            to_update.append(row)
+    to_create = [build(pid, quantity) for pid, quantity in wanted.items() if pid not in current]
+
+    if to_delete:
+        model.objects.filter(pk__in=to_delete).delete()
+    if to_update:
+        model.objects.bulk_update(to_update, ['quantity'])
+    if to_create:
+        model.objects.bulk_create(to_create)
+
+
+def add_item(user_id, product_id, quantity=1):
+    """Atomically add `quantity` to a saved cart line, creating it if needed.
+
+    One INSERT ... ON CONFLICT DO UPDATE ... RETURNING round-trip (SQLite
+    3.35+, PostgreSQL) backed by the unique (user, product) constraint.
+    Returns the new quantity, capped at MAX_LINE_QUANTITY.
+    """
+    table = connection.ops.quote_name(CartItem._meta.db_table)
+    quantity = min(quantity, MAX_LINE_QUANTITY)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (user_id, product_id, quantity) VALUES (%s, %s, %s) "
+            f"ON CONFLICT (user_id, product_id) DO UPDATE SET quantity = CASE "
+            f"WHEN {table}.quantity + excluded.quantity > %s THEN %s "
+            f"ELSE {table}.quantity + excluded.quantity END "
+            f"RETURNING quantity",
+            [user_id, product_id, quantity, MAX_LINE_QUANTITY, MAX_LINE_QUANTITY],
+        )
+        return cursor.fetchone()[0]
+
+
+@transaction.atomic
+def persist(user, lines):
+    """Save `lines` as the user's CartItem rows, replacing what was there.
+
+    One delete plus one upsert; nothing is read first, so concurrent saves
+    can't create duplicate rows or resurrect stale quantities.
+    """
+    wanted = {
+        pid: min(lines[pid], MAX_LINE_QUANTITY)
+        for pid in Product.objects.filter(id__in=[pid for pid, quantity in lines.items() if quantity > 0])
+        .values_list('id', flat=True)
+    }
+    CartItem.objects.filter(user=user).exclude(product_id__in=list(wanted)).delete()
+    CartItem.objects.bulk_create(
+        [CartItem(user=user, product_id=pid, quantity=quantity) for pid, quantity in wanted.items()],
+        update_conflicts=True, unique_fields=['user', 'product'], update_fields=['quantity'],
+    )
+
+
+def merge_at_login(request, user):
+    """Combine the guest cart with the user's saved one and save the result."""
+    backend = get_cart(request)
+    guest = SessionCart.lines(backend) if isinstance(backend, DatabaseCart) else backend.lines()
+    merged = dict(CartItem.objects.filter(user=user).values_list('product_id', 'quantity'))
+    for pid, quantity in guest.items():
+        # The same basket may already have been saved from this browser.
+        merged[pid] = max(merged.get(pid, 0), quantity)
+    persist(user, merged)
+    backend.logged_in(merged)
+
+
+# ======================
+# CART -> ORDER SYNC
+# ======================
+# The user's pending Order is brought in line with their saved cart only
+# when they start checkout, in one transaction.
+
+PENDING = 'pending'
+
+
+@transaction.atomic
+def sync_pending_order(user):
+    """Make the user's pending order mirror their CartItems and return it."""
+    order = Order.objects.filter(user=user, status=PENDING).order_by('-id').first()
+    if order is None:
+        order = Order.objects.create(user=user, status=PENDING)
+
+    wanted = dict(CartItem.objects.filter(user=user).values_list('product_id', 'quantity'))
+    current = {item.product_id: item for item in order.items.only('id', 'product_id', 'quantity')}
+    _apply(OrderItem, current, wanted, lambda pid, quantity: OrderItem(order=order, product_id=pid, quantity=quantity))
+    return order
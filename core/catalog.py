@@ -0,0 +1,107 @@
+from .models import (
+    CatalogEntry, Product, ProductCategory, Carpet, GreenWall, SportsProduct,
+    ArtificialPlant,
+)
+
+
+# ======================
+# CATALOG READ MODEL
+# ======================
+# Each source model is projected into one CatalogEntry row on save (see
+# core/signals.py). Existing rows were projected by migration 0050; the
+# backfill_catalog command re-projects them after bulk changes.
+
+def _project_product(obj, categories=None):
+    if categories is not None:
+        category = categories.get(obj.category_id, '')
+    else:
+        category = obj.category.name if obj.category_id else ''
+    return {
+        'title': obj.name,
+        'description': obj.description,
+        'category': category,
+        'price': obj.price,
+        'image': obj.main_image.name,
+    }
+
+
+def _project_titled(obj, categories=None):
+    return {
+        'title': obj.title,
+        'description': obj.description,
+        'category': getattr(obj, 'category', None) or '',
+        'price': obj.price,
+        'image': obj.image.name,
+    }
+
+
+# kind -> (model, projection)
+CATALOG_SOURCES = {
+    'product': (Product, _project_product),
+    'carpet': (Carpet, _project_titled),
+    'greenwall': (GreenWall, _project_titled),
+    'sports': (SportsProduct, _project_titled),
+    'plant': (ArtificialPlant, _project_titled),
+}
+
+KIND_BY_LABEL = {model._meta.label_lower: kind for kind, (model, _) in CATALOG_SOURCES.items()}
+
+PROJECTED_FIELDS = ['title', 'description', 'category', 'price', 'image']
+
+
+def build_entry(kind, obj, categories=None):
+    _, project = CATALOG_SOURCES[kind]
+    return CatalogEntry(kind=kind, object_id=obj.pk, **project(obj, categories))
+
+
+def project(kind, obj):
+    _, project_fn = CATALOG_SOURCES[kind]
+    CatalogEntry.objects.update_or_create(
+        kind=kind, object_id=obj.pk, defaults=project_fn(obj),
+    )
+
+
+def project_many(kind, objs, categories=None):
+    """Upsert entries for already-saved `objs`, e.g. rows inserted with bulk_create."""
+    return _upsert([build_entry(kind, obj, categories) for obj in objs])
+
+
+def unproject(kind, pk):
+    CatalogEntry.objects.filter(kind=kind, object_id=pk).delete()
+
+
+def rename_category(category):
+    CatalogEntry.objects.filter(
+        kind='product',
+        object_id__in=Product.objects.filter(category=category).values('id'),
+    ).update(category=category.name)
+
+
+def backfill(kind, batch_size=1000):
+    """Upsert CatalogEntry rows for every `kind` source row, `batch_size` at a time.
+
+    Yields the number of rows written per batch so callers can report progress.
+    """
+    model, _ = CATALOG_SOURCES[kind]
+    categories = None
+    if kind == 'product':
+        categories = dict(ProductCategory.objects.values_list('id', 'name'))
+
+    batch = []
+    for obj in model.objects.order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(build_entry(kind, obj, categories))
+        if len(batch) >= batch_size:
+            yield _upsert(batch)
+            batch = []
+    if batch:
+        yield _upsert(batch)
+
+
+def _upsert(entries):
+    CatalogEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=PROJECTED_FIELDS + ['updated_at'],
+    )
+    return len(entries)
@@ -0,0 +1,82 @@
+import threading
+
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+
+
+# ======================
+# PRODUCT CODE ALLOCATION
+# ======================
+# Hi/lo allocation: each process reserves BLOCK_SIZE consecutive values from
+# the CodeSequence row in one UPDATE and hands them out from memory, so
+# concurrent or bulk product creation never collides and never costs a
+# round-trip per code. Unused values in a block are simply skipped when the
+# process exits.
+#
+# A block is only kept if its reservation commits on its own. Inside a
+# caller's transaction (admin views, ATOMIC_REQUESTS) a rollback would undo
+# the bump while the process kept the block, and another process would then
+# be given the same range; there each value is reserved singly as part of the
+# caller's transaction instead, so it rolls back together with its use.
+
+SEQUENCE_NAME = 'product'
+BLOCK_SIZE = 100
+# GS1 prefixes 20-29 are reserved for in-store numbering, so generated
+# EAN-13s can't clash with real manufacturer barcodes.
+EAN13_PREFIX = '20'
+
+
+class HiLoAllocator:
+    def __init__(self, name, block_size=BLOCK_SIZE, using=DEFAULT_DB_ALIAS):
+        self.name = name
+        self.block_size = block_size
+        self.using = using
+        self.next = self.end = 0
+        self.lock = threading.Lock()
+
+    def _reserve(self, count):
+        """Bump the sequence by `count` and return the first reserved value."""
+        CodeSequence = apps.get_model('core', 'CodeSequence')
+        sequence = CodeSequence.objects.using(self.using)
+        # The relative UPDATE takes the row (on SQLite, database) write lock
+        # before the read-back, so concurrent reservations never overlap.
+        with transaction.atomic(using=self.using):
+            sequence.get_or_create(name=self.name)
+            sequence.filter(name=self.name).update(next_value=F('next_value') + count)
+            end = sequence.values_list('next_value', flat=True).get(name=self.name)
+        return end - count
+
+    def allocate(self):
+        with self.lock:
+            if self.next >= self.end:
+                if connections[self.using].in_atomic_block:
+                    return self._reserve(1)
+                self.next = self._reserve(self.block_size)
+                self.end = self.next + self.block_size
+            value = self.next
+            self.next += 1
+            return value
+
+
+def ean13_check_digit(body):
+    """GS1 mod-10 check digit for a 12-digit body."""
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(body))
+    return str((10 - total % 10) % 10)
+
+
+def format_code(value, barcode_type):
+    """Render a sequence value as a code valid for `barcode_type`."""
+    if barcode_type == 'ean13':
+        body = f'{EAN13_PREFIX}{value:010d}'
+        if len(body) != 12:
+            raise ValueError(f"Sequence value {value} does not fit in an EAN-13")
+        return body + ean13_check_digit(body)
+    return str(value)
+
+
+_allocator = HiLoAllocator(SEQUENCE_NAME)
+
+
+def next_product_code(barcode_type):
+    return format_code(_allocator.allocate(), barcode_type)
@@ -1,13 +1,13 @@
 from .models import NavbarLogo, NavbarMenuItem
 from .models import SiteSettings
+from .caching import memoized
 
 def navbar_context(request):
     return {
-        'navbar_logo': NavbarLogo.objects.all(),
-        'navbar_menu_items': NavbarMenuItem.objects.all()
+        'navbar_logo': memoized('core.navbarlogo', lambda: list(NavbarLogo.objects.all())),
+        'navbar_menu_items': memoized('core.navbarmenuitem', lambda: list(NavbarMenuItem.objects.all())),
     }
-from .models import SiteSettings
 
 def site_settings(request):
-    settings = SiteSettings.objects.first()
-    return {'site_settings': settings}
\ No newline at end of file
+    settings = memoized('core.sitesettings', SiteSettings.objects.first)
+    return {'site_settings': settings}
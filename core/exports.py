@@ -0,0 +1,125 @@
+import csv
+import json
+import zlib
+from dataclasses import dataclass
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Sum
+from django.http import StreamingHttpResponse
+
+from .models import Invoice, Order, Payment
+
+
+# ======================
+# STREAMING EXPORTS
+# ======================
+# Orders, payments and invoices are exported as gzip-compressed CSV or JSONL.
+# Rows are read with .iterator() and encoded and compressed as they arrive,
+# so memory stays flat however many rows the queryset matches. Related
+# columns are read through values_list() lookups, which join user, address
+# and order in the same query without building model instances.
+
+CHUNK_SIZE = 2000
+FLUSH_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    model: type
+    columns: tuple
+    prepare: object = None
+
+    def rows(self, queryset, chunk_size=CHUNK_SIZE):
+        queryset = self.prepare(queryset) if self.prepare else queryset.order_by('pk')
+        return queryset.values_list(*self.columns).iterator(chunk_size=chunk_size)
+
+
+def orders_queryset(queryset):
+    # Totals are summed in SQL so no OrderItem rows are loaded.
+    return queryset.annotate(
+        item_count=Sum('items__quantity'),
+        items_total=Sum(F('items__quantity') * F('items__product__price')),
+    ).order_by('id')
+
+
+EXPORTS = {
+    'orders': ExportSpec(
+        model=Order,
+        prepare=orders_queryset,
+        columns=(
+            'id', 'created_at', 'status', 'user__username', 'user__email',
+            'delivery_address__full_name', 'delivery_address__phone_number',
+            'delivery_address__city', 'delivery_address__state', 'delivery_address__pincode',
+            'item_count', 'items_total',
+        ),
+    ),
+    'payments': ExportSpec(
+        model=Payment,
+        columns=(
+            'id', 'created_at', 'status', 'amount', 'user__username', 'order_id',
+            'razorpay_order_id', 'razorpay_payment_id',
+        ),
+    ),
+    'invoices': ExportSpec(
+        model=Invoice,
+        columns=(
+            'invoice_number', 'billing_date', 'order_id', 'order__user__username',
+            'total_amount', 'tax', 'billing_address__full_name', 'billing_address__city',
+            'billing_address__pincode',
+        ),
+    ),
+}
+
+
+class _Line:
+    """csv.writer target that hands back each encoded row."""
+
+    def write(self, value):
+        return value
+
+
+def encode_csv(columns, rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def encode_jsonl(columns, rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + '\n'
+
+
+ENCODERS = {
+    'csv': encode_csv,
+    'jsonl': encode_jsonl,
+}
+
+
+def gzip_stream(lines, level=6):
+    """Gzip an iterable of text lines, yielding compressed chunks of ~64 KiB."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    pending, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        pending.append(data)
+        size += len(data)
+        if size >= FLUSH_BYTES:
+            chunk = compressor.compress(b''.join(pending))
+            pending, size = [], 0
+            if chunk:
+                yield chunk
+    yield compressor.compress(b''.join(pending)) + compressor.flush()
+
+
+def export(kind, queryset, fmt='csv', chunk_size=CHUNK_SIZE):
+    """Yield the gzip-compressed export of `queryset` (a queryset of EXPORTS[kind])."""
+    spec = EXPORTS[kind]
+    return gzip_stream(ENCODERS[fmt](spec.columns, spec.rows(queryset, chunk_size)))
+
+
+def export_response(kind, queryset, fmt='csv'):
+    response = StreamingHttpResponse(export(kind, queryset, fmt), content_type='application/gzip')
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}.gz"'
+    return response
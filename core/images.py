@@ -0,0 +1,183 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from io import BytesIO
+from PIL import Image, ImageOps
+
+from .caching import bump_version
+
+logger = logging.getLogger(__name__)
+
+
+# ======================
+# RESPONSIVE IMAGE DERIVATIVES
+# ======================
+# Every uploaded image gets downscaled WebP and JPEG copies stored next to
+# the original as "<name>__w<width>.<ext>". Widths above the original size
+# are skipped so nothing is ever upscaled.
+#
+# Which widths exist for a file is recorded in the cache when they are
+# written, so rendering a page never stats the storage. Uploads saved
+# through the admin are processed on a background thread after commit, so
+# the request doesn't wait for Pillow. Once new files exist the owning
+# model's fragment version is bumped, so cached pages pick up the srcsets.
+
+DERIVATIVE_WIDTHS = (320, 640, 1024, 1600)
+DERIVATIVE_FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+DERIVATIVE_MARKER = '__w'
+WIDTHS_CACHE_KEY = 'core.images.widths:{digest}'
+WIDTHS_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+# Model label -> ImageFields that get derivatives.
+IMAGE_FIELDS = {
+    'core.product': ('main_image',),
+    'core.productimage': ('image',),
+    'core.heroslide': ('image',),
+    'core.secondaryhero': ('image',),
+    'core.event': ('image',),
+    'core.carpet': ('image',),
+    'core.greenwall': ('image',),
+    'core.sportsproduct': ('image',),
+    'core.artificialplant': ('image',),
+}
+
+
+def derivative_name(name, width, ext):
+    root, _ = os.path.splitext(name)
+    return f'{root}{DERIVATIVE_MARKER}{width}.{ext}'
+
+
+def is_derivative(name):
+    root, _ = os.path.splitext(os.path.basename(name))
+    head, sep, tail = root.rpartition(DERIVATIVE_MARKER)
+    return bool(sep) and tail.isdigit()
+
+
+def _probe_widths(name, storage):
+    # Generation always writes every width up to the original's, so probing
+    # stops at the first missing width instead of statting all of them.
+    widths = []
+    for width in DERIVATIVE_WIDTHS:
+        if not storage.exists(derivative_name(name, width, 'webp')):
+            break
+        widths.append(width)
+    return widths
+
+
+def _widths_key(name):
+    # Hashed: file names may contain characters cache backends reject in keys.
+    return WIDTHS_CACHE_KEY.format(digest=hashlib.sha1(name.encode()).hexdigest())
+
+
+def _remember_widths(name, widths):
+    cache.set(_widths_key(name), widths, WIDTHS_CACHE_TIMEOUT)
+
+
+def available_widths(name, storage=default_storage):
+    """Widths with derivatives on disk, smallest first (cached; probed once per file)."""
+    key = _widths_key(name)
+    widths = cache.get(key)
+    if widths is None:
+        widths = _probe_widths(name, storage)
+        cache.set(key, widths, WIDTHS_CACHE_TIMEOUT)
+    return widths
+
+
+def generate_derivatives(name, storage=default_storage, force=False):
+    """Write the missing derivatives of `name`; return how many files were written."""
+    if not name or is_derivative(name):
+        return 0
+    written = _write_derivatives(name, storage, force)
+    _remember_widths(name, _probe_widths(name, storage))
+    return written
+
+
+def _write_derivatives(name, storage, force):
+    todo = [
+        (width, ext, fmt, options)
+        for width in DERIVATIVE_WIDTHS
+        for ext, fmt, options in DERIVATIVE_FORMATS
+        if force or not storage.exists(derivative_name(name, width, ext))
+    ]
+    if not todo:
+        return 0
+
+    with storage.open(name, 'rb') as f:
+        # Image.open only parses the header, so images narrower than every
+        # missing width are rejected without decoding any pixels.
+        original = Image.open(f)
+        todo = [item for item in todo if item[0] <= original.width]
+        if not todo:
+            return 0
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    # Derivatives must keep their exact names, so bypass content addressing.
+    writer = getattr(storage, 'raw', storage)
+    written = 0
+    for width, ext, fmt, options in todo:
+        height = round(original.height * width / original.width)
+        resized = original.resize((width, height), Image.LANCZOS)
+        if fmt == 'JPEG' and resized.mode not in ('RGB', 'L'):
+            resized = resized.convert('RGB')
+        buffer = BytesIO()
+        resized.save(buffer, format=fmt, **options)
+        target = derivative_name(name, width, ext)
+        if writer.exists(target):
+            writer.delete(target)
+        writer.save(target, ContentFile(buffer.getvalue()))
+        written += 1
+    return written
+
+
+def delete_derivatives(name, storage=default_storage):
+    cache.delete(_widths_key(name))
+    storage = getattr(storage, 'raw', storage)
+    for width in DERIVATIVE_WIDTHS:
+        for ext, _, _ in DERIVATIVE_FORMATS:
+            target = derivative_name(name, width, ext)
+            if storage.exists(target):
+                storage.delete(target)
+
+
+def _instance_files(instance):
+    for field in IMAGE_FIELDS.get(instance._meta.label_lower, ()):
+        file = getattr(instance, field)
+        if file and file.name:
+            yield file.name, file.storage
+
+
+def _generate_files(label, files):
+    written = 0
+    for name, storage in files:
+        try:
+            written += generate_derivatives(name, storage=storage)
+        except (OSError, ValueError) as e:
+            logger.warning("Image derivative generation failed for %s: %s", name, e)
+    if written:
+        bump_version(label)
+
+
+def generate_for_instance(instance):
+    _generate_files(instance._meta.label_lower, list(_instance_files(instance)))
+
+
+# One background thread: uploads are rare, and Pillow already uses the
+# cores it needs. Anything lost to a restart is picked up by the
+# generate_image_derivatives command.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-derivatives')
+
+
+def schedule_for_instance(instance):
+    """Generate `instance`'s derivatives off the request thread."""
+    files = list(_instance_files(instance))
+    if files:
+        _executor.submit(_generate_files, instance._meta.label_lower, files)
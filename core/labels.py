@@ -0,0 +1,221 @@
+import io
+import os
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont
+
+from .barcodes import render_png
+
+
+# ======================
+# BARCODE LABEL SHEETS
+# ======================
+# Products are laid out N-up on A4 pages. Each page is rendered by a worker
+# process, and pages are streamed out in order as they finish, either as a
+# hand-written PDF (one lossless grayscale image per page) or as a zip of
+# PNGs. Memory use stays bounded by a handful of pages in flight.
+
+DPI = 200
+A4_MM = (210, 297)
+A4_PT = (595.28, 841.89)
+
+
+def _mm(value):
+    return round(value / 25.4 * DPI)
+
+
+@dataclass(frozen=True)
+class SheetLayout:
+    columns: int = 3
+    rows: int = 8
+    margin_mm: float = 8
+    gap_mm: float = 2
+
+    @property
+    def per_page(self):
+        return self.columns * self.rows
+
+
+@dataclass(frozen=True)
+class Label:
+    name: str
+    price: str
+    code: str
+
+
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except (TypeError, ImportError):
+        return ImageFont.load_default()
+
+
+def render_page(labels, layout, barcode_type):
+    """Render one sheet as an 8-bit grayscale image."""
+    page_w, page_h = _mm(A4_MM[0]), _mm(A4_MM[1])
+    page = Image.new('L', (page_w, page_h), 255)
+    draw = ImageDraw.Draw(page)
+    margin, gap = _mm(layout.margin_mm), _mm(layout.gap_mm)
+    cell_w = (page_w - 2 * margin - (layout.columns - 1) * gap) // layout.columns
+    cell_h = (page_h - 2 * margin - (layout.rows - 1) * gap) // layout.rows
+    title_font, price_font = _font(cell_h // 9), _font(cell_h // 8)
+
+    for i, label in enumerate(labels):
+        col, row = i % layout.columns, i // layout.columns
+        x = margin + col * (cell_w + gap)
+        y = margin + row * (cell_h + gap)
+        pad = cell_h // 16
+        draw.text((x + pad, y + pad), label.name[:40], fill=0, font=title_font)
+        draw.text((x + cell_w - pad, y + pad), label.price, fill=0, font=price_font, anchor='ra')
+
+        text_h = cell_h // 4
+        box = (cell_w - 2 * pad, cell_h - text_h - 2 * pad)
+        try:
+            code_img = Image.open(BytesIO(render_png(label.code, barcode_type))).convert('L')
+        except Exception:
+            draw.text((x + pad, y + text_h + pad), label.code, fill=0, font=title_font)
+            continue
+        code_img.thumbnail(box, Image.NEAREST)
+        page.paste(code_img, (x + (cell_w - code_img.width) // 2, y + text_h + pad))
+    return page
+
+
+def _page_png(args):
+    labels, layout, barcode_type = args
+    buffer = BytesIO()
+    render_page(labels, layout, barcode_type).save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def _page_raw(args):
+    labels, layout, barcode_type = args
+    page = render_page(labels, layout, barcode_type)
+    return page.width, page.height, zlib.compress(page.tobytes(), 6)
+
+
+def _pages(labels, layout):
+    page = []
+    for label in labels:
+        page.append(label)
+        if len(page) == layout.per_page:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def _render_pages(job, labels, layout, barcode_type, workers):
+    """Yield rendered pages in order, keeping at most a few per worker in flight."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        # Not worth starting a process for, e.g. a one-page sheet.
+        for page in _pages(labels, layout):
+            yield job((page, layout, barcode_type))
+        return
+    window = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for page in _pages(labels, layout):
+            window.append(pool.submit(job, (page, layout, barcode_type)))
+            if len(window) >= workers * 2:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+# ======================
+# OUTPUT FORMATS
+# ======================
+def stream_pdf(labels, layout, barcode_type, workers=None):
+    """Yield a PDF with one page per sheet, written incrementally."""
+    offsets = {}
+    written = 0
+    page_ids = []
+
+    def obj(num, body, stream=None):
+        nonlocal written
+        offsets[num] = written
+        chunk = f'{num} 0 obj\n'.encode() + body
+        if stream is not None:
+            chunk += b'\nstream\n' + stream + b'\nendstream'
+        chunk += b'\nendobj\n'
+        written += len(chunk)
+        return chunk
+
+    header = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    written = len(header)
+    yield header
+
+    # 1 = catalog and 2 = page tree are written last, once all kids are known.
+    next_id = 3
+    page_w, page_h = A4_PT
+    for width, height, data in _render_pages(_page_raw, labels, layout, barcode_type, workers):
+        image_id, content_id, page_id = next_id, next_id + 1, next_id + 2
+        next_id += 3
+        yield obj(image_id, (
+            f'<< /Type /XObject /Subtype /Image /Width {width} /Height {height} '
+            f'/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode /Length {len(data)} >>'
+        ).encode(), data)
+        content = f'q {page_w} 0 0 {page_h} 0 0 cm /Im0 Do Q'.encode()
+        yield obj(content_id, f'<< /Length {len(content)} >>'.encode(), content)
+        yield obj(page_id, (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_w} {page_h}] '
+            f'/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>'
+        ).encode())
+        page_ids.append(page_id)
+
+    kids = ' '.join(f'{pid} 0 R' for pid in page_ids)
+    yield obj(2, f'<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>'.encode())
+    yield obj(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+
+    xref = [f'xref\n0 {next_id}\n', '0000000000 65535 f \n']
+    for num in range(1, next_id):
+        xref.append(f'{offsets[num]:010d} 00000 n \n')
+    xref.append(f'trailer\n<< /Size {next_id} /Root 1 0 R >>\nstartxref\n{written}\n%%EOF\n')
+    yield ''.join(xref).encode()
+
+
+class _Sink(io.RawIOBase):
+    """Write-only, unseekable buffer so zipfile streams instead of seeking back."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+def stream_png_zip(labels, layout, barcode_type, workers=None):
+    """Yield a zip archive of sheet-NNNN.png files, written incrementally."""
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for number, png in enumerate(_render_pages(_page_png, labels, layout, barcode_type, workers), 1):
+            archive.writestr(f'sheet-{number:04d}.png', png)
+            yield sink.drain()
+    yield sink.drain()
+
+
+FORMATS = {
+    'pdf': (stream_pdf, 'application/pdf', 'labels.pdf'),
+    'zip': (stream_png_zip, 'application/zip', 'labels.zip'),
+}
+
+
+def labels_for(queryset, chunk_size=2000):
+    """Stream Label tuples for a Product queryset without loading model instances."""
+    rows = queryset.exclude(code__isnull=True).exclude(code='').order_by('id')
+    for name, price, code in rows.values_list('name', 'price', 'code').iterator(chunk_size=chunk_size):
+        # The bundled Pillow font has no rupee glyph.
+        yield Label(name=name, price=f'Rs. {price}', code=code)
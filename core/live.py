@@ -0,0 +1,126 @@
+import asyncio
+import json
+import threading
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from . import rollups
+from .models import BuyingDetail, Order, Payment, Product, SellingDetail
+
+
+# ======================
+# LIVE DASHBOARD METRICS
+# ======================
+# An in-process pub/sub between model signals and the dashboard's
+# Server-Sent Events stream (core.admin_views.dashboard_stream). A change
+# recomputes the affected counters once, after commit, and the result is
+# fanned out to every open dashboard in this process; tabs never query.
+# Changes made by other processes (e.g. management commands) reach the
+# counters on the next change seen here.
+
+KEEPALIVE_SECONDS = 15
+# Django 4.2's ASGI handler doesn't cancel a streaming response when the
+# client goes away, so each stream ends on its own after this long and the
+# browser's EventSource reconnects (after RETRY_MS). A closed tab therefore
+# holds its subscription for at most this long.
+STREAM_SECONDS = 5 * 60
+RETRY_MS = 1000
+QUEUE_SIZE = 100
+
+
+def _rollup_counters():
+    totals = rollups.totals()
+    return {
+        'total_sells': totals['sales'],
+        'total_buying': totals['purchases'],
+        'total_payments': totals['payments'],
+        'total_orders': totals['orders'],
+    }
+
+
+# model -> function returning the counters it can change
+COUNTER_SOURCES = {
+    Order: _rollup_counters,
+    Payment: _rollup_counters,
+    SellingDetail: _rollup_counters,
+    BuyingDetail: _rollup_counters,
+    Product: lambda: {'total_products': Product.objects.count()},
+    User: lambda: {'total_users': User.objects.count()},
+}
+
+
+def counters():
+    """Compute every counter from scratch (initial snapshot)."""
+    snapshot = {}
+    for compute in set(COUNTER_SOURCES.values()):
+        snapshot.update(compute())
+    return snapshot
+
+
+class Broker:
+    """Fan-out of events to asyncio queues, safe to publish from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self.snapshot = None
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers = {item for item in self._subscribers if item[1] is not queue}
+            if not self._subscribers:
+                # Nobody was listening to keep it current.
+                self.snapshot = None
+
+    def publish(self, event, data):
+        if event == 'counters' and self.snapshot is not None:
+            self.snapshot = {**self.snapshot, **data}
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_offer, queue, (event, data))
+
+    @property
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+
+def _offer(queue, item):
+    # A stalled client only misses events; counters are full snapshots anyway.
+    try:
+        queue.put_nowait(item)
+    except asyncio.QueueFull:
+        pass
+
+
+broker = Broker()
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, default=str)}\n\n'
+
+
+def model_changed(sender, instance, created=False):
+    """Signal hook: publish the changed counters (and new orders) after commit."""
+    compute = COUNTER_SOURCES.get(sender)
+    if compute is None or not broker.has_subscribers:
+        return
+
+    def push():
+        broker.publish('counters', compute())
+        if sender is Order and created:
+            broker.publish('order', {
+                'id': instance.pk,
+                'user': instance.user.username,
+                'status': instance.status,
+                'created_at': instance.created_at.isoformat(),
+            })
+
+    transaction.on_commit(push)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core import catalog, suggest
+
+
+class Command(BaseCommand):
+    help = "Project existing Product, Carpet, GreenWall, SportsProduct and ArtificialPlant rows into the catalog search table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--kind', action='append', choices=list(catalog.CATALOG_SOURCES),
+            help="Only backfill this kind (repeatable). Defaults to all.",
+        )
+
+    def handle(self, *args, **options):
+        kinds = options['kind'] or list(catalog.CATALOG_SOURCES)
+        for kind in kinds:
+            written = 0
+            for count in catalog.backfill(kind, batch_size=options['batch_size']):
+                written += count
+                self.stdout.write(f"  {kind}: {written} rows", ending='\r')
+            self.stdout.write(self.style.SUCCESS(f"{kind}: {written} rows projected"))
+        # bulk_create sends no signals, so tell every worker to rebuild its typeahead index.
+        suggest.invalidate()
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from core.caching import clear_memo
+from core.context_processors import navbar_context, site_settings
+from core.models import NavbarLogo, NavbarMenuItem, SiteSettings
+
+
+class Command(BaseCommand):
+    help = "Measure queries and time spent in the navbar/site-settings context processors."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        n = options['requests']
+        request = RequestFactory().get('/')
+
+        def run():
+            for _ in range(n):
+                ctx = {**navbar_context(request), **site_settings(request)}
+                # Templates iterate the menu, so force evaluation like a render would.
+                list(ctx['navbar_logo'])
+                list(ctx['navbar_menu_items'])
+
+        def uncached():
+            for _ in range(n):
+                list(NavbarLogo.objects.all())
+                list(NavbarMenuItem.objects.all())
+                SiteSettings.objects.first()
+
+        for label, fn in (('uncached', uncached), ('memoized', run)):
+            clear_memo()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                fn()
+                elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"{label:>9}: {len(queries) / n:.2f} queries/request, "
+                f"{elapsed / n * 1000:.3f} ms/request over {n} requests"
+            )
@@ -0,0 +1,97 @@
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.images import is_derivative
+from core.storage import CAS_PREFIX, content_hash, file_fields, hashed_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Move every file referenced by a FileField/ImageField into content-addressed "
+        "storage, collapsing byte-identical duplicates into one blob."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument(
+            '--delete-originals', action='store_true',
+            help="Remove the old files once no row references them.",
+        )
+        parser.add_argument(
+            '--gc', action='store_true',
+            help="Also delete content-addressed blobs that no row references.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        # old name -> content-addressed name; one hash per distinct file.
+        renamed = {}
+        moved = rows = 0
+
+        for model, field in file_fields():
+            # Read up front: the loop rewrites this same column, and a
+            # server-side cursor over it could skip or revisit rows.
+            names = list(
+                model._default_manager.exclude(**{field.name: ''})
+                .exclude(**{f'{field.name}__startswith': f'{CAS_PREFIX}/'})
+                .values_list(field.name, flat=True).distinct()
+            )
+            for name in names:
+                if name not in renamed:
+                    if not default_storage.exists(name):
+                        self.stderr.write(f"  missing: {name}")
+                        continue
+                    renamed[name] = self._store(name, dry_run)
+                    moved += 1
+                if not dry_run:
+                    with transaction.atomic():
+                        # update() skips save(), so no barcode/catalog side effects fire.
+                        rows += model._default_manager.filter(**{field.name: name}).update(
+                            **{field.name: renamed[name]}
+                        )
+
+        blobs = len(set(renamed.values()))
+        self.stdout.write(self.style.SUCCESS(
+            f"{moved} files -> {blobs} blobs ({moved - blobs} duplicates), {rows} rows updated"
+        ))
+
+        if options['delete_originals'] and not dry_run:
+            for name in renamed:
+                default_storage.raw.delete(name)
+            self.stdout.write(f"Deleted {len(renamed)} original files")
+
+        if options['gc']:
+            self._gc(dry_run)
+
+        if moved and not dry_run:
+            self.stdout.write("Run generate_image_derivatives to rebuild responsive sizes for the new names.")
+
+    def _store(self, name, dry_run):
+        with default_storage.open(name, 'rb') as f:
+            if dry_run:
+                return hashed_name(name, content_hash(f))
+            return default_storage.save(name, f)
+
+    def _gc(self, dry_run):
+        referenced = set()
+        for model, field in file_fields():
+            referenced.update(
+                model._default_manager.filter(**{f'{field.name}__startswith': f'{CAS_PREFIX}/'})
+                .values_list(field.name, flat=True)
+            )
+
+        root = os.path.join(settings.MEDIA_ROOT, CAS_PREFIX)
+        removed = 0
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                name = os.path.relpath(os.path.join(dirpath, filename), settings.MEDIA_ROOT).replace(os.sep, '/')
+                if is_derivative(name) or name in referenced:
+                    continue
+                if not dry_run:
+                    default_storage.delete(name)
+                removed += 1
+        self.stdout.write(f"{'Would remove' if dry_run else 'Removed'} {removed} unreferenced blobs")
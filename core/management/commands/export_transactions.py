@@ -0,0 +1,45 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import exports
+
+# kind -> date field used by --since/--until
+DATE_FIELDS = {
+    'orders': 'created_at',
+    'payments': 'created_at',
+    'invoices': 'billing_date',
+}
+
+
+class Command(BaseCommand):
+    help = "Write orders, payments or invoices to a gzip-compressed CSV or JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(exports.EXPORTS))
+        parser.add_argument('output', help="Destination file, e.g. orders-2025.csv.gz.")
+        parser.add_argument('--format', choices=sorted(exports.ENCODERS), default='csv')
+        parser.add_argument('--since', type=date.fromisoformat, help="First day included (YYYY-MM-DD).")
+        parser.add_argument('--until', type=date.fromisoformat, help="Last day included (YYYY-MM-DD).")
+        parser.add_argument('--status', help="Only rows with this status (orders and payments).")
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        queryset = exports.EXPORTS[kind].model.objects.all()
+        field = DATE_FIELDS[kind]
+        if options['since']:
+            queryset = queryset.filter(**{f'{field}__date__gte': options['since']})
+        if options['until']:
+            queryset = queryset.filter(**{f'{field}__date__lte': options['until']})
+        if options['status']:
+            if kind == 'invoices':
+                raise CommandError("Invoices have no status; filter orders instead.")
+            queryset = queryset.filter(status=options['status'])
+
+        size = 0
+        with open(options['output'], 'wb') as f:
+            for chunk in exports.export(kind, queryset, options['format'], options['chunk_size']):
+                f.write(chunk)
+                size += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {size // 1024} KiB to {options['output']}"))
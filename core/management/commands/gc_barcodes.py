@@ -0,0 +1,36 @@
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core.barcodes import BARCODE_DIR
+from core.models import Product
+
+
+class Command(BaseCommand):
+    help = "Delete barcode images under media/barcodes/ that no Product references."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        referenced = set(
+            Product.objects.exclude(barcode_image='').values_list('barcode_image', flat=True)
+        )
+        storage = getattr(default_storage, 'raw', default_storage)
+        root = os.path.join(settings.MEDIA_ROOT, BARCODE_DIR)
+
+        removed = 0
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                name = os.path.relpath(os.path.join(dirpath, filename), settings.MEDIA_ROOT).replace(os.sep, '/')
+                if name in referenced:
+                    continue
+                if not options['dry_run']:
+                    storage.delete(name)
+                removed += 1
+                self.stdout.write(f"  {name}")
+
+        verb = "Would remove" if options['dry_run'] else "Removed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {removed} orphaned barcode files."))
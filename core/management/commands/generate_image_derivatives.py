@@ -0,0 +1,62 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.caching import bump_version
+from core.images import IMAGE_FIELDS, generate_derivatives, is_derivative
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+# Generated files that never get displayed at multiple sizes.
+SKIP_DIRS = {'barcodes'}
+
+
+def _media_images(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        if os.path.relpath(dirpath, root) == '.':
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for filename in filenames:
+            if os.path.splitext(filename)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+            name = os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, '/')
+            if not is_derivative(name):
+                yield name
+
+
+def _generate(name, force):
+    return name, generate_derivatives(name, force=force)
+
+
+class Command(BaseCommand):
+    help = "Generate responsive WebP/JPEG derivatives for every image under MEDIA_ROOT."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--force', action='store_true', help="Regenerate derivatives that already exist.")
+
+    def handle(self, *args, **options):
+        names = list(_media_images(settings.MEDIA_ROOT))
+        self.stdout.write(f"Processing {len(names)} images with {options['workers']} workers")
+
+        written = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = [pool.submit(_generate, name, options['force']) for name in names]
+            for future in as_completed(futures):
+                try:
+                    name, count = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"  failed: {e}")
+                    continue
+                written += count
+                if count:
+                    self.stdout.write(f"  {name}: {count} files")
+
+        if written:
+            # Files on disk don't map back to rows, so refresh every model's
+            # cached fragments that may now render new srcsets.
+            for label in IMAGE_FIELDS:
+                bump_version(label)
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} derivatives ({failed} failures)."))
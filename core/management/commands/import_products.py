@@ -0,0 +1,175 @@
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from core import catalog, suggest
+from core.barcodes import barcode_path, render_job
+from core.caching import bump_version
+from core.codes import next_product_code
+from core.images import generate_derivatives
+from core.models import BarcodeSettings, Product, ProductCategory
+
+
+def _read_rows(path):
+    if path.endswith('.jsonl'):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            yield from csv.DictReader(f)
+
+
+def _store_image(path):
+    """Copy a local image into media storage and write its derivatives."""
+    with open(path, 'rb') as f:
+        name = default_storage.save(f'products/{os.path.basename(path)}', File(f))
+    generate_derivatives(name)
+    return name
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream products from a .csv or .jsonl file (name, category, price, "
+        "description, image, code) into the catalog with bulk_create. Images and "
+        "barcodes are rendered by a process pool while the next batch is read."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input .csv or .jsonl file.")
+        parser.add_argument('--images', help="Directory holding the files named in the image column.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if not os.path.isfile(options['path']):
+            raise CommandError(f"No such file: {options['path']}")
+
+        self.image_dir = options['images']
+        self.barcode_type = BarcodeSettings.current_type()
+        self.categories = dict(ProductCategory.objects.values_list('name', 'id'))
+        self.created = self.skipped = self.failed = 0
+
+        # bulk_create skips Product.save(), so codes and barcode paths are
+        # assigned here and the files are rendered in the background.
+        barcodes = []
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            batch = []
+            for line, row in enumerate(_read_rows(options['path']), 2):
+                product = self._build(row, line)
+                if product is None:
+                    continue
+                batch.append((product, self._image_path(row)))
+                if len(batch) >= options['batch_size']:
+                    barcodes = self._flush(batch, pool, barcodes)
+                    batch = []
+            barcodes = self._flush(batch, pool, barcodes)
+            self._drain(barcodes)
+
+        # No post_save signals fired: refresh the home grid and typeahead caches.
+        bump_version('core.product')
+        suggest.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.created} products "
+            f"({self.skipped} rows skipped, {self.failed} barcodes failed)."
+        ))
+
+    def _category_id(self, name):
+        name = (name or '').strip()[:100] or 'Default Category'
+        if name not in self.categories:
+            self.categories[name] = ProductCategory.objects.get_or_create(name=name)[0].id
+        return self.categories[name]
+
+    def _image_path(self, row):
+        image = (row.get('image') or '').strip()
+        if not image or not self.image_dir:
+            return None
+        path = os.path.join(self.image_dir, image)
+        if not os.path.isfile(path):
+            self.stderr.write(f"  missing image {path}")
+            return None
+        return path
+
+    def _skip(self, line, reason):
+        self.stderr.write(f"  line {line}: {reason}, skipped")
+        self.skipped += 1
+
+    def _clean(self, field, value):
+        # The model field's own checks (max_length, max_digits, ...) so a bad
+        # row is reported here instead of failing the whole batch's INSERT.
+        return Product._meta.get_field(field).clean(value, None)
+
+    def _build(self, row, line):
+        name = (row.get('name') or '').strip()
+        if not name:
+            return self._skip(line, "missing name")
+        try:
+            price = self._clean('price', str(row.get('price') or '').strip())
+        except ValidationError as e:
+            return self._skip(line, f"invalid price ({' '.join(e.messages)})")
+        code = str(row.get('code') or '').strip()
+        try:
+            if code:
+                self._clean('code', code)
+        except ValidationError as e:
+            return self._skip(line, f"invalid code ({' '.join(e.messages)})")
+        code = code or next_product_code(self.barcode_type)
+        return Product(
+            name=name[:100],
+            category_id=self._category_id(row.get('category')),
+            price=price,
+            description=row.get('description') or '',
+            code=code,
+            barcode_image=barcode_path(code, self.barcode_type),
+        )
+
+    def _drain(self, futures):
+        for future in futures:
+            code, _, error = future.result()
+            if error:
+                self.failed += 1
+                self.stderr.write(f"  barcode {code}: {error}")
+
+    def _flush(self, batch, pool, previous):
+        """Insert one batch and queue its barcodes.
+
+        Waits for the previous batch's barcodes first, so at most two batches
+        of futures are ever held.
+        """
+        codes = [product.code for product, _ in batch]
+        taken = set(Product.objects.filter(code__in=codes).values_list('code', flat=True))
+        products, images = [], {}
+        for product, path in batch:
+            if product.code in taken:
+                self.stderr.write(f"  code {product.code} already exists, skipped")
+                self.skipped += 1
+                continue
+            taken.add(product.code)
+            if path:
+                images[len(products)] = pool.submit(_store_image, path)
+            products.append(product)
+
+        self._drain(previous)
+        if not products:
+            return []
+
+        for i, future in images.items():
+            try:
+                products[i].main_image = future.result()
+            except Exception as e:
+                self.stderr.write(f"  image for {products[i].name}: {e}")
+
+        Product.objects.bulk_create(products)
+        categories = {pk: name for name, pk in self.categories.items()}
+        catalog.project_many('product', products, categories)
+        self.created += len(products)
+        self.stdout.write(f"  {self.created} products")
+
+        return [pool.submit(render_job, (p.code, self.barcode_type)) for p in products]
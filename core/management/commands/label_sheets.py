@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from core import labels
+from core.models import BarcodeSettings, Product
+
+
+class Command(BaseCommand):
+    help = "Write N-up barcode label sheets for a product selection to a PDF or zip of PNGs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Destination file (.pdf or .zip).")
+        parser.add_argument('--category', help="Only products in this category (by name).")
+        parser.add_argument('--ids', help="Comma-separated product ids.")
+        parser.add_argument('--columns', type=int, default=3)
+        parser.add_argument('--rows', type=int, default=8)
+        parser.add_argument('--workers', type=int, default=None)
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.all()
+        if options['category']:
+            queryset = queryset.filter(category__name=options['category'])
+        if options['ids']:
+            queryset = queryset.filter(id__in=[int(i) for i in options['ids'].split(',')])
+
+        fmt = 'zip' if options['output'].lower().endswith('.zip') else 'pdf'
+        stream = labels.FORMATS[fmt][0]
+        layout = labels.SheetLayout(columns=options['columns'], rows=options['rows'])
+
+        size = 0
+        with open(options['output'], 'wb') as f:
+            for chunk in stream(labels.labels_for(queryset), layout, BarcodeSettings.current_type(), options['workers']):
+                f.write(chunk)
+                size += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {size // 1024} KiB to {options['output']}"))
@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from core import rollups
+
+CHUNK_DAYS = 31
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the dashboard's daily rollups for a date range. Without "
+        "arguments it repairs yesterday and today, which suits a periodic job."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat, help="First day (YYYY-MM-DD).")
+        parser.add_argument('--until', type=date.fromisoformat, help="Last day (YYYY-MM-DD), default today.")
+        parser.add_argument('--all', action='store_true', help="Start from the oldest recorded activity.")
+
+    def handle(self, *args, **options):
+        until = options['until'] or timezone.localdate()
+        since = options['since'] or until - timedelta(days=1)
+        if options['all']:
+            since = self._first_day() or until
+        if since > until:
+            raise CommandError("--since is after --until.")
+
+        days = 0
+        start = since
+        while start <= until:
+            end = min(start + timedelta(days=CHUNK_DAYS - 1), until)
+            days += rollups.rebuild(start, end)
+            self.stdout.write(f"  {start} .. {end}", ending='\r')
+            start = end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rollups for {since} .. {until} ({days} active days)."))
+
+    def _first_day(self):
+        firsts = [
+            model.objects.aggregate(first=Min(field))['first']
+            for model, (field, _) in rollups.ROLLUP_SOURCES.items()
+        ]
+        firsts = [timezone.localdate(value) for value in firsts if value]
+        return min(firsts, default=None)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the SQLite FTS5 catalog search index from scratch."
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The FTS5 search index is only available on SQLite.")
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
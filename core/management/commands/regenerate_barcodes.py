@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from core.barcodes import delete_if_unreferenced, regenerate_all
+from core.models import BarcodeSettings
+
+
+class Command(BaseCommand):
+    help = "Re-render every Product barcode for the configured (or given) symbology."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type', choices=[choice for choice, _ in BarcodeSettings.BARCODE_TYPES],
+            help="Symbology to render. Defaults to BarcodeSettings.",
+        )
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--keep-stale', action='store_true', help="Don't delete the replaced images.")
+
+    def handle(self, *args, **options):
+        barcode_type = options['type'] or BarcodeSettings.current_type()
+        self.stdout.write(f"Regenerating barcodes as {barcode_type}")
+
+        updated, failed, stale = regenerate_all(
+            barcode_type,
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            progress=self.stdout.write,
+        )
+
+        removed = 0
+        if not options['keep_stale']:
+            removed = sum(delete_if_unreferenced(name) for name in stale)
+
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(
+            f"{updated} products updated, {failed} failed, {removed} stale images removed."
+        ))
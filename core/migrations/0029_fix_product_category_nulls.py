@@ -4,8 +4,12 @@ def set_default_category(apps, schema_editor):
     Product = apps.get_model('core', 'Product')
     ProductCategory = apps.get_model('core', 'ProductCategory')
 
+    orphans = Product.objects.filter(category__isnull=True)
+    if not orphans.exists():
+        # Nothing to fix (e.g. a fresh database, which has no default category).
+        return
     default_cat = ProductCategory.objects.get(name="Default Category")
-    Product.objects.filter(category__isnull=True).update(category=default_cat)
+    orphans.update(category=default_cat)
 
 class Migration(migrations.Migration):
 
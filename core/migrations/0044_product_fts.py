@@ -0,0 +1,68 @@
+from django.db import migrations
+
+# External-content FTS5 index over core_product(name, description). The
+# triggers keep it in step with every write path, including bulk_create()
+# and queryset.update(), which never send model signals.
+FTS_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS core_product_fts USING fts5(
+        name, description,
+        content='core_product', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_product_fts_ai AFTER INSERT ON core_product BEGIN
+        INSERT INTO core_product_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_product_fts_ad AFTER DELETE ON core_product BEGIN
+        INSERT INTO core_product_fts(core_product_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_product_fts_au AFTER UPDATE OF name, description ON core_product BEGIN
+        INSERT INTO core_product_fts(core_product_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO core_product_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    "INSERT INTO core_product_fts(core_product_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS core_product_fts_au",
+    "DROP TRIGGER IF EXISTS core_product_fts_ad",
+    "DROP TRIGGER IF EXISTS core_product_fts_ai",
+    "DROP TABLE IF EXISTS core_product_fts",
+]
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in FTS_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0043_address_delete_newsletter_remove_order_address_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,84 @@
+from django.db import migrations, models
+
+# FTS5 index over the catalog read model, maintained by triggers in the same
+# way as core_product_fts (see 0044_product_fts).
+FTS_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS core_catalogentry_fts USING fts5(
+        title, description, category,
+        content='core_catalogentry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_catalogentry_fts_ai AFTER INSERT ON core_catalogentry BEGIN
+        INSERT INTO core_catalogentry_fts(rowid, title, description, category)
+        VALUES (new.id, new.title, new.description, new.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_catalogentry_fts_ad AFTER DELETE ON core_catalogentry BEGIN
+        INSERT INTO core_catalogentry_fts(core_catalogentry_fts, rowid, title, description, category)
+        VALUES ('delete', old.id, old.title, old.description, old.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_catalogentry_fts_au AFTER UPDATE OF title, description, category ON core_catalogentry BEGIN
+        INSERT INTO core_catalogentry_fts(core_catalogentry_fts, rowid, title, description, category)
+        VALUES ('delete', old.id, old.title, old.description, old.category);
+        INSERT INTO core_catalogentry_fts(rowid, title, description, category)
+        VALUES (new.id, new.title, new.description, new.category);
+    END
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS core_catalogentry_fts_au",
+    "DROP TRIGGER IF EXISTS core_catalogentry_fts_ad",
+    "DROP TRIGGER IF EXISTS core_catalogentry_fts_ai",
+    "DROP TABLE IF EXISTS core_catalogentry_fts",
+]
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in FTS_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0044_product_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('product', 'Product'), ('carpet', 'Carpet'), ('greenwall', 'Green Wall'), ('sports', 'Sports Product'), ('plant', 'Artificial Plant')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('category', models.CharField(blank=True, max_length=100)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('image', models.ImageField(blank=True, max_length=255, upload_to='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Catalog entries',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_catalog_entry')],
+            },
+        ),
+        migrations.RunPython(create_fts, drop_fts),
+    ]
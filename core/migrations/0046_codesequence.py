@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+def seed_product_sequence(apps, schema_editor):
+    # Continue after the timestamp-based codes issued so far.
+    Product = apps.get_model('core', 'Product')
+    CodeSequence = apps.get_model('core', 'CodeSequence')
+    numeric = [int(code) for code in Product.objects.values_list('code', flat=True) if code and code.isdigit()]
+    CodeSequence.objects.get_or_create(name='product', defaults={'next_value': max(numeric, default=0) + 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0045_catalogentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+        ),
+        migrations.RunPython(seed_product_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    # Same sources as core.rollups.ROLLUP_SOURCES, over the whole history.
+    sources = [
+        ('Order', 'created_at', {'orders': Count('id')}),
+        ('Payment', 'created_at', {
+            'payments': Count('id'),
+            'revenue': Sum('amount', filter=Q(status='paid')),
+        }),
+        ('SellingDetail', 'sold_on', {'sales': Count('id'), 'units_sold': Sum('quantity')}),
+        ('BuyingDetail', 'bought_on', {'purchases': Count('id')}),
+    ]
+    DailyRollup = apps.get_model('core', 'DailyRollup')
+    by_day = {}
+    for model_name, field, aggregates in sources:
+        rows = (
+            apps.get_model('core', model_name).objects
+            .annotate(rollup_day=TruncDate(field))
+            .values('rollup_day')
+            .annotate(**aggregates)
+            .order_by()
+        )
+        for row in rows:
+            day = row.pop('rollup_day')
+            by_day.setdefault(day, {}).update({name: value or 0 for name, value in row.items()})
+    DailyRollup.objects.bulk_create(
+        [DailyRollup(day=day, **values) for day, values in by_day.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0047_payment_razorpay_id_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='sellingdetail',
+            name='sold_on',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='buyingdetail',
+            name='bought_on',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('payments', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('sales', models.PositiveIntegerField(default=0)),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('purchases', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['day'],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+import importlib
+
+from django.db import migrations
+
+# The product index from 0044 is superseded by core_catalogentry_fts.
+product_fts = importlib.import_module('core.migrations.0044_product_fts')
+
+
+def _project_product(obj, categories):
+    return {
+        'title': obj.name,
+        'description': obj.description,
+        'category': categories.get(obj.category_id, ''),
+        'price': obj.price,
+        'image': obj.main_image.name,
+    }
+
+
+def _project_titled(obj, categories):
+    return {
+        'title': obj.title,
+        'description': obj.description,
+        'category': getattr(obj, 'category', None) or '',
+        'price': obj.price,
+        'image': obj.image.name,
+    }
+
+
+def backfill_catalog(apps, schema_editor):
+    # Same sources and projections as core.catalog.CATALOG_SOURCES, over
+    # every existing row; the 0045 triggers index each entry written.
+    sources = [
+        ('product', 'Product', _project_product),
+        ('carpet', 'Carpet', _project_titled),
+        ('greenwall', 'GreenWall', _project_titled),
+        ('sports', 'SportsProduct', _project_titled),
+        ('plant', 'ArtificialPlant', _project_titled),
+    ]
+    CatalogEntry = apps.get_model('core', 'CatalogEntry')
+    categories = dict(apps.get_model('core', 'ProductCategory').objects.values_list('id', 'name'))
+    for kind, model_name, project in sources:
+        rows = apps.get_model('core', model_name).objects.order_by('pk')
+        CatalogEntry.objects.bulk_create(
+            [CatalogEntry(kind=kind, object_id=obj.pk, **project(obj, categories)) for obj in rows],
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['kind', 'object_id'],
+            update_fields=['title', 'description', 'category', 'price', 'image', 'updated_at'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0049_cartitem_unique_user_product'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_catalog, migrations.RunPython.noop),
+        migrations.RunPython(product_fts.drop_fts, product_fts.create_fts),
+    ]
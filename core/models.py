@@ -1,11 +1,13 @@
-from django.db import models
+import logging
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.utils import timezone
-from io import BytesIO
-from django.core.files import File
-import barcode
-from barcode.writer import ImageWriter
-import qrcode
+from django.urls import reverse
+from .barcodes import barcode_path, ensure_barcode, delete_if_unreferenced, DEFAULT_BARCODE_TYPE
+from .caching import memoized
+from .codes import next_product_code
+
+logger = logging.getLogger(__name__)
 
 
 # ------------------ CONTEXT PROCESSORS ------------------
@@ -76,6 +78,20 @@ class BarcodeSettings(models.Model):
     def __str__(self):
         return self.get_barcode_type_display()
 
+    @classmethod
+    def current_type(cls):
+        settings = memoized('core.barcodesettings', cls.objects.first)
+        return settings.barcode_type if settings else DEFAULT_BARCODE_TYPE
+
+class CodeSequence(models.Model):
+    """Counter behind core.codes' hi/lo allocator; each worker reserves a
+    block of values at a time instead of hitting this row per product."""
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
 # ------------------ PRODUCT MODELS ------------------
 class ProductCategory(models.Model):
     name = models.CharField(max_length=100)
@@ -94,27 +110,30 @@ class Product(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.code:
-            self.code = str(int(timezone.now().timestamp()))
-
-        buffer = BytesIO()
-        try:
-            barcode_setting = BarcodeSettings.objects.first()
-            barcode_type = barcode_setting.barcode_type if barcode_setting else 'code128'
-
-            if barcode_type == 'qrcode':
-                img = qrcode.make(self.code)
-                img.save(buffer, format='PNG')
-            else:
-                bc_class = barcode.get_barcode_class(barcode_type)
-                bc = bc_class(self.code, writer=ImageWriter())
-                bc.write(buffer)
-
-            self.barcode_image.save(f"{self.code}.png", File(buffer), save=False)
-        except Exception as e:
-            print(f"Barcode generation failed: {e}")
+            self.code = next_product_code(BarcodeSettings.current_type())
+
+        # Only (code, barcode type) determines the image, so anything else
+        # (price edits, renames) skips rendering entirely.
+        stale_barcode = None
+        barcode_type = BarcodeSettings.current_type()
+        expected = barcode_path(self.code, barcode_type)
+        if self.barcode_image.name != expected:
+            try:
+                name = ensure_barcode(self.code, barcode_type, storage=self.barcode_image.storage)
+                stale_barcode, self.barcode_image.name = self.barcode_image.name, name
+                update_fields = kwargs.get('update_fields')
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'barcode_image'}
+            except Exception:
+                logger.exception("Barcode generation failed for product code %s", self.code)
 
         super().save(*args, **kwargs)
 
+        if stale_barcode:
+            # Only once the new path is committed; a rollback keeps the old one in use.
+            storage = self.barcode_image.storage
+            transaction.on_commit(lambda: delete_if_unreferenced(stale_barcode, storage=storage))
+
     def __str__(self):
         return self.name
 
@@ -137,6 +156,11 @@ class CartItem(models.Model):
     def total_price(self):
         return self.quantity * self.product.price
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product'], name='unique_cart_item_per_product'),
+        ]
+
 class Event(models.Model):
     image = models.ImageField(upload_to='events/')
     title = models.CharField(max_length=200)
@@ -216,7 +240,7 @@ class Order(models.Model):
         related_name='orders'
     )
     status = models.CharField(max_length=20, default='pending')
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def __str__(self):
         return f"Order #{self.id} - {self.user.username}"
@@ -299,6 +323,48 @@ class ArtificialPlant(models.Model):
     def __str__(self):
         return self.title
 
+# ------------------ CATALOG SEARCH ------------------
+class CatalogEntry(models.Model):
+    """Denormalized read model of every sellable item, projected from the
+    five catalog models by core.catalog so search is one indexed query."""
+    KIND_CHOICES = [
+        ('product', 'Product'),
+        ('carpet', 'Carpet'),
+        ('greenwall', 'Green Wall'),
+        ('sports', 'Sports Product'),
+        ('plant', 'Artificial Plant'),
+    ]
+    LISTING_URLS = {
+        'carpet': 'carpet_view',
+        'greenwall': 'greenwalls_view',
+        'sports': 'sports_view',
+        'plant': 'artificial_plants_view',
+    }
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    category = models.CharField(max_length=100, blank=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    image = models.ImageField(blank=True, max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Catalog entries'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_catalog_entry'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
+
+    def get_absolute_url(self):
+        # Only Product has a detail page; the legacy catalogs link to their listing.
+        if self.kind == 'product':
+            return reverse('product_detail', args=[self.object_id])
+        return reverse(self.LISTING_URLS[self.kind])
+
 # ------------------ BUSINESS & TRANSACTIONS ------------------
 class BusinessProfile(models.Model):
     BUSINESS_TYPES = [
@@ -324,7 +390,7 @@ class SellingDetail(models.Model):
     quantity = models.PositiveIntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     seller = models.ForeignKey(User, on_delete=models.CASCADE)
-    sold_on = models.DateTimeField(auto_now_add=True)
+    sold_on = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def __str__(self):
         return f"{self.product_name} sold by {self.seller}"
@@ -333,7 +399,7 @@ class BuyingDetail(models.Model):
     product_name = models.CharField(max_length=255)
     quantity = models.PositiveIntegerField()
     buyer = models.ForeignKey(User, on_delete=models.CASCADE)
-    bought_on = models.DateTimeField(auto_now_add=True)
+    bought_on = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def __str__(self):
         return f"{self.product_name} bought by {self.buyer}"
@@ -385,11 +451,11 @@ class Payment(models.Model):
     order = models.OneToOneField(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='payment')
 
     amount = models.DecimalField(max_digits=10, decimal_places=2)
-    razorpay_order_id = models.CharField(max_length=255, blank=True, null=True)
-    razorpay_payment_id = models.CharField(max_length=255, blank=True, null=True)
+    razorpay_order_id = models.CharField(max_length=255, blank=True, null=True, db_index=True)
+    razorpay_payment_id = models.CharField(max_length=255, blank=True, null=True, db_index=True)
     razorpay_signature = models.CharField(max_length=255, blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='created')
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     raw_response = models.JSONField(blank=True, null=True)
 
     def __str__(self):
@@ -417,4 +483,21 @@ class Delivery(models.Model):
     estimated_delivery_date = models.DateField(null=True, blank=True)
 
     def __str__(self):
-        return f"Delivery for Order #{self.order.id}"
\ No newline at end of file
+        return f"Delivery for Order #{self.order.id}"
+
+# ------------------ DASHBOARD ROLLUPS ------------------
+class DailyRollup(models.Model):
+    """Per-day totals for the admin dashboards, kept current by core.rollups."""
+    day = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    payments = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    sales = models.PositiveIntegerField(default=0)
+    units_sold = models.PositiveIntegerField(default=0)
+    purchases = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['day']
+
+    def __str__(self):
+        return f"Rollup {self.day}"
@@ -0,0 +1,154 @@
+from django.core import signing
+from django.db.models import Q
+
+
+# ======================
+# KEYSET (CURSOR) PAGINATION
+# ======================
+# Pages are addressed by the (sort_key, id) of their edge row instead of an
+# OFFSET, so every page is a single indexed range scan no matter how deep it
+# is, and rows inserted meanwhile never shift page contents.
+
+CURSOR_SALT = 'core.pagination.cursor'
+
+
+class CursorPage:
+    """One page of results. Rows are fetched lazily on first access."""
+
+    def __init__(self, paginator, cursor):
+        self.paginator = paginator
+        self.cursor = cursor
+        self._rows = None
+        self._has_next = False
+        self._has_previous = False
+
+    def _fetch(self):
+        if self._rows is not None:
+            return self._rows
+        p = self.paginator
+        direction, position = self.cursor or ('next', None)
+        backwards = direction == 'prev'
+
+        qs = p.queryset
+        if position is not None:
+            qs = qs.filter(p.seek_filter(position, backwards))
+        qs = qs.order_by(*p.ordering(reverse=backwards))
+        rows = list(qs[:p.per_page + 1])
+
+        more = len(rows) > p.per_page
+        rows = rows[:p.per_page]
+        if backwards:
+            rows.reverse()
+            self._has_previous = more
+            self._has_next = True
+        else:
+            self._has_next = more
+            self._has_previous = position is not None
+        self._rows = rows
+        return rows
+
+    @property
+    def has_next(self):
+        self._fetch()
+        return self._has_next
+
+    @property
+    def has_previous(self):
+        self._fetch()
+        return self._has_previous
+
+    @property
+    def key(self):
+        """Stable string for the decoded position ('' for the first page), e.g.
+        for cache keys; unlike the raw token it can't be chosen freely."""
+        if self.cursor is None:
+            return ''
+        direction, (value, pk) = self.cursor
+        return f'{direction}:{pk}:{value}'
+
+    @property
+    def object_list(self):
+        return self._fetch()
+
+    @property
+    def next_cursor(self):
+        rows = self._fetch()
+        if not (self._has_next and rows):
+            return ''
+        return self.paginator.encode('next', rows[-1])
+
+    @property
+    def previous_cursor(self):
+        rows = self._fetch()
+        if not (self._has_previous and rows):
+            return ''
+        return self.paginator.encode('prev', rows[0])
+
+    def __iter__(self):
+        return iter(self._fetch())
+
+    def __len__(self):
+        return len(self._fetch())
+
+    def __bool__(self):
+        return bool(self._fetch())
+
+
+class CursorPaginator:
+    """
+    Seek-based paginator over `queryset` ordered by (`sort_key`, id).
+
+    `sort_key` may be prefixed with '-' for descending order and must be a
+    non-null column. The total row count is only computed when `with_count`
+    is set, since it is the one part of paging that cannot use the index.
+    """
+
+    def __init__(self, queryset, per_page, sort_key='-id', with_count=False):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.descending = sort_key.startswith('-')
+        self.field = sort_key.lstrip('-')
+        self.with_count = with_count
+
+    def ordering(self, reverse=False):
+        desc = self.descending != reverse
+        prefix = '-' if desc else ''
+        if self.field in ('id', 'pk'):
+            return (f'{prefix}id',)
+        return (f'{prefix}{self.field}', f'{prefix}id')
+
+    def seek_filter(self, position, reverse=False):
+        value, pk = position
+        op = 'lt' if self.descending != reverse else 'gt'
+        if self.field in ('id', 'pk'):
+            return Q(**{f'id__{op}': pk})
+        return Q(**{f'{self.field}__{op}': value}) | Q(**{self.field: value, f'id__{op}': pk})
+
+    def encode(self, direction, obj):
+        value = getattr(obj, self.field)
+        if not isinstance(value, (int, str)):
+            value = str(value)
+        return signing.dumps((direction, (value, obj.pk)), salt=CURSOR_SALT, compress=True)
+
+    def decode(self, token):
+        if not token:
+            return None
+        try:
+            direction, position = signing.loads(token, salt=CURSOR_SALT)
+        except (signing.BadSignature, ValueError, TypeError):
+            return None
+        if direction not in ('next', 'prev'):
+            return None
+        return direction, tuple(position)
+
+    def get_page(self, token):
+        """Return the page addressed by `token`; invalid tokens fall back to the first page."""
+        return CursorPage(self, self.decode(token))
+
+    @property
+    def count(self):
+        if not self.with_count:
+            return None
+        if not hasattr(self, '_count'):
+            self._count = self.queryset.count()
+        return self._count
@@ -0,0 +1,196 @@
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils._os import safe_join
+from PIL import Image, ImageOps
+
+from .images import DERIVATIVE_WIDTHS
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to an exclusive-create lock file
+    fcntl = None
+
+
+# ======================
+# ON-DEMAND IMAGE RESIZING
+# ======================
+# /media-resized/<w>x<h>/<path> renders a resized copy of a MEDIA_ROOT file
+# on first request and keeps it in a size-bounded on-disk cache. A file
+# lock per derivative makes concurrent misses across threads and worker
+# processes wait for a single Pillow decode instead of each doing their own.
+# Only the sizes in settings.RESIZED_MEDIA_SIZES (by default the responsive
+# srcset widths) are served, so the endpoint can't be used to queue
+# arbitrary renders.
+
+MAX_DIMENSION = 2400
+DEFAULT_SIZES = tuple((width, 0) for width in DERIVATIVE_WIDTHS)
+# A lock file older than this is assumed to belong to a crashed render.
+STALE_LOCK_SECONDS = 60
+FORMATS = {
+    '.jpg': ('JPEG', 'image/jpeg'),
+    '.jpeg': ('JPEG', 'image/jpeg'),
+    '.png': ('PNG', 'image/png'),
+    '.webp': ('WEBP', 'image/webp'),
+}
+# Evict down to this fraction of the limit so a full cache doesn't rescan
+# the directory on every subsequent miss.
+EVICT_TARGET = 0.9
+# Each worker walks the cache directory once per this many renders.
+EVICT_EVERY = 32
+
+_renders = 0
+
+
+def cache_root():
+    return getattr(settings, 'RESIZED_MEDIA_ROOT', os.path.join(settings.BASE_DIR, '.cache', 'resized'))
+
+
+def cache_limit():
+    return getattr(settings, 'RESIZED_MEDIA_MAX_BYTES', 512 * 1024 * 1024)
+
+
+def allowed_sizes():
+    return {tuple(size) for size in getattr(settings, 'RESIZED_MEDIA_SIZES', DEFAULT_SIZES)}
+
+
+def validate(width, height, path):
+    """Return (source path, PIL format, content type) or raise ValueError."""
+    if (width, height) not in allowed_sizes():
+        raise ValueError("Unsupported size")
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError("Unsupported format")
+    try:
+        source = safe_join(settings.MEDIA_ROOT, path)
+    except Exception:
+        raise ValueError("Invalid path")
+    if not os.path.isfile(source):
+        raise FileNotFoundError(path)
+    return source, *FORMATS[ext]
+
+
+def cache_path(width, height, source):
+    # The source mtime is part of the key, so replacing an upload never
+    # serves the old derivative from disk.
+    stamp = f'{width}x{height}:{source}:{os.stat(source).st_mtime_ns}'
+    digest = hashlib.sha1(stamp.encode()).hexdigest()
+    ext = os.path.splitext(source)[1].lower()
+    return os.path.join(cache_root(), digest[:2], digest + ext)
+
+
+@contextmanager
+def _locked(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if fcntl is None:
+        with _create_locked(path + '.lock'):
+            yield
+        return
+    with open(path + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+    _remove_quietly(path + '.lock')
+
+
+@contextmanager
+def _create_locked(lock_path):
+    while True:
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(lock_path).st_mtime > STALE_LOCK_SECONDS:
+                    _remove_quietly(lock_path)
+                    continue
+            except OSError:
+                continue
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        _remove_quietly(lock_path)
+
+
+def _render(source, target, width, height, fmt):
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        if width and height:
+            img = ImageOps.fit(img, (width, height), Image.LANCZOS)
+        else:
+            img.thumbnail((width or MAX_DIMENSION, height or MAX_DIMENSION), Image.LANCZOS)
+        if fmt == 'JPEG' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        tmp = f'{target}.{os.getpid()}.tmp'
+        img.save(tmp, format=fmt, quality=82)
+    os.replace(tmp, target)
+
+
+def get_resized(width, height, path):
+    """Return (cached file path, content type), rendering it on a miss."""
+    source, fmt, content_type = validate(width, height, path)
+    target = cache_path(width, height, source)
+    if os.path.exists(target):
+        _touch(target)
+        return target, content_type
+
+    global _renders
+    with _locked(target):
+        # Another thread or worker may have rendered it while we waited.
+        if not os.path.exists(target):
+            _render(source, target, width, height, fmt)
+            _renders += 1
+            if _renders % EVICT_EVERY == 0:
+                evict()
+    return target, content_type
+
+
+def _touch(path):
+    # mtime doubles as the LRU clock.
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def evict(limit=None):
+    """Delete least recently used files until the cache fits in `limit` bytes."""
+    limit = cache_limit() if limit is None else limit
+    files = []
+    total = 0
+    for dirpath, _, filenames in os.walk(cache_root()):
+        for filename in filenames:
+            if filename.endswith(('.lock', '.tmp')):
+                continue
+            full = os.path.join(dirpath, filename)
+            try:
+                st = os.stat(full)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, full))
+            total += st.st_size
+    if total <= limit:
+        return 0
+
+    removed = 0
+    files.sort()
+    for _, size, full in files:
+        if total <= limit * EVICT_TARGET:
+            break
+        _remove_quietly(full)
+        total -= size
+        removed += 1
+    return removed
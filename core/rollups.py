@@ -0,0 +1,95 @@
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import BuyingDetail, DailyRollup, Order, Payment, SellingDetail
+
+
+# ======================
+# DAILY DASHBOARD ROLLUPS
+# ======================
+# One DailyRollup row per day holds what the admin dashboards chart. Saving
+# or deleting a source row recomputes only that row's day (an indexed
+# one-day range scan, see core/signals.py), and `rebuild_rollups` recomputes
+# any date range with one GROUP BY per source, so dashboards read a few
+# hundred small rows whatever the size of the history.
+
+# model -> (date field, {rollup field: aggregate})
+ROLLUP_SOURCES = {
+    Order: ('created_at', {'orders': Count('id')}),
+    Payment: ('created_at', {
+        'payments': Count('id'),
+        'revenue': Sum('amount', filter=Q(status='paid')),
+    }),
+    SellingDetail: ('sold_on', {'sales': Count('id'), 'units_sold': Sum('quantity')}),
+    BuyingDetail: ('bought_on', {'purchases': Count('id')}),
+}
+
+ROLLUP_FIELDS = [name for _, aggregates in ROLLUP_SOURCES.values() for name in aggregates]
+
+
+def _bounds(start, end):
+    """Aware datetimes covering local days start..end inclusive."""
+    low = timezone.make_aware(datetime.combine(start, time.min))
+    high = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+    return low, high
+
+
+def compute(start, end):
+    """Return {day: {field: value}} for days in start..end that have any activity."""
+    low, high = _bounds(start, end)
+    totals = {}
+    for model, (field, aggregates) in ROLLUP_SOURCES.items():
+        rows = (
+            model.objects
+            .filter(**{f'{field}__gte': low, f'{field}__lt': high})
+            .annotate(rollup_day=TruncDate(field))
+            .values('rollup_day')
+            .annotate(**aggregates)
+            .order_by()
+        )
+        for row in rows:
+            day = row.pop('rollup_day')
+            totals.setdefault(day, {}).update({name: value or 0 for name, value in row.items()})
+    return totals
+
+
+def rebuild(start, end):
+    """Recompute the rollup rows for start..end; return how many days had activity."""
+    rows = [
+        DailyRollup(day=day, **{**dict.fromkeys(ROLLUP_FIELDS, 0), **values})
+        for day, values in compute(start, end).items()
+    ]
+    with transaction.atomic():
+        DailyRollup.objects.filter(day__range=(start, end)).delete()
+        DailyRollup.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['day'], update_fields=ROLLUP_FIELDS,
+        )
+    return len(rows)
+
+
+def schedule_refresh(value):
+    """Recompute the day `value` falls on once the current transaction commits."""
+    day = timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    transaction.on_commit(lambda: rebuild(day, day))
+
+
+# ======================
+# DASHBOARD QUERIES
+# ======================
+def totals():
+    sums = DailyRollup.objects.aggregate(**{name: Sum(name) for name in ROLLUP_FIELDS})
+    return {name: value or 0 for name, value in sums.items()}
+
+
+def monthly(fields, since):
+    """Return {field: {"Mon YYYY": total}} for rollups from `since` onwards."""
+    series = {name: {} for name in fields}
+    for row in DailyRollup.objects.filter(day__gte=since).values('day', *fields):
+        label = row['day'].strftime("%b %Y")
+        for name in fields:
+            series[name][label] = series[name].get(label, 0) + row[name]
+    return series
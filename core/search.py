@@ -0,0 +1,107 @@
+import re
+
+from django.db import DatabaseError, connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+from .models import CatalogEntry
+
+
+# ======================
+# FULL-TEXT SEARCH
+# ======================
+# Backed by the FTS5 table over the catalog read model created in migration
+# 0045 (core_catalogentry_fts), kept in sync by triggers, so one query
+# covers products and the other four catalogs. Falls back to LIKE scans on
+# other databases or when the index is missing.
+
+CATALOG_FTS = 'core_catalogentry_fts'
+FTS_TABLES = (CATALOG_FTS,)
+
+# bm25() column weights: a hit in the title counts ten times one in the
+# description; a category hit sits in between.
+CATALOG_WEIGHTS = (10.0, 1.0, 3.0)
+
+# Control characters can't occur in user-entered text, so they are safe
+# placeholders for the highlight markers until the text has been escaped.
+HL_START, HL_END = '\x02', '\x03'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match_query(query):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    tokens = TOKEN_RE.findall(query or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _highlight(text):
+    return mark_safe(
+        escape(text or '').replace(HL_START, '<mark>').replace(HL_END, '</mark>')
+    )
+
+
+def _fts_hits(table, weights, match, limit):
+    """Return [(rowid, highlighted title, description snippet)] best match first."""
+    weight_args = ', '.join(str(w) for w in weights)
+    sql = f"""
+        SELECT rowid,
+               highlight({table}, 0, char(2), char(3)),
+               snippet({table}, 1, char(2), char(3), '…', 16)
+        FROM {table}
+        WHERE {table} MATCH %s
+        ORDER BY bm25({table}, {weight_args})
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, limit])
+        return cursor.fetchall()
+
+
+def _ranked(queryset, hits):
+    objects = queryset.in_bulk([row[0] for row in hits])
+    results = []
+    for pk, title_hl, snippet in hits:
+        obj = objects.get(pk)
+        if obj is None:
+            continue
+        obj.name_highlight = _highlight(title_hl)
+        obj.snippet = _highlight(snippet)
+        results.append(obj)
+    return results
+
+
+def _unranked(queryset, title_field, query, limit):
+    results = list(
+        queryset.filter(
+            Q(**{f'{title_field}__icontains': query}) | Q(description__icontains=query)
+        )[:limit]
+    )
+    for obj in results:
+        obj.name_highlight = getattr(obj, title_field)
+        obj.snippet = Truncator(obj.description).chars(120)
+    return results
+
+
+def search_catalog(query, limit=50):
+    """Return up to `limit` CatalogEntry rows across all five catalogs, best match first."""
+    match = build_match_query(query)
+    if not match:
+        return []
+    queryset = CatalogEntry.objects.all()
+    if connection.vendor != 'sqlite':
+        return _unranked(queryset, 'title', query, limit)
+    try:
+        hits = _fts_hits(CATALOG_FTS, CATALOG_WEIGHTS, match, limit)
+    except DatabaseError:
+        return _unranked(queryset, 'title', query, limit)
+    return _ranked(queryset, hits)
+
+
+def rebuild_index(tables=FTS_TABLES):
+    """Repopulate the FTS indexes from their content tables."""
+    with connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
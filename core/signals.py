@@ -0,0 +1,113 @@
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.dispatch import receiver
+
+from .caching import HOME_FRAGMENTS, MEMOIZED_MODELS, bump_version
+from . import cart, catalog, images, live, rollups, suggest
+from .models import CatalogEntry, ProductCategory
+
+
+# ======================
+# CACHE INVALIDATION
+# ======================
+VERSIONED_MODELS = {label for deps in HOME_FRAGMENTS.values() for label in deps}
+VERSIONED_MODELS.update(MEMOIZED_MODELS)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_model_version(sender, **kwargs):
+    label = sender._meta.label_lower
+    if label in VERSIONED_MODELS:
+        # After commit: bumping earlier would let another worker cache the
+        # old row under the new version, where it would stay forever.
+        transaction.on_commit(lambda: bump_version(label))
+
+
+# ======================
+# CATALOG PROJECTION
+# ======================
+@receiver(post_save)
+def project_catalog_entry(sender, instance, raw=False, **kwargs):
+    kind = catalog.KIND_BY_LABEL.get(sender._meta.label_lower)
+    if kind and not raw:
+        catalog.project(kind, instance)
+
+
+@receiver(post_delete)
+def unproject_catalog_entry(sender, instance, **kwargs):
+    kind = catalog.KIND_BY_LABEL.get(sender._meta.label_lower)
+    if kind:
+        catalog.unproject(kind, instance.pk)
+
+
+@receiver(post_save, sender=ProductCategory)
+def rename_catalog_category(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        catalog.rename_category(instance)
+
+
+# ======================
+# TYPEAHEAD INDEX
+# ======================
+@receiver(post_save, sender=CatalogEntry)
+def update_suggest_index(sender, instance, **kwargs):
+    suggest.entry_saved(instance)
+
+
+@receiver(post_delete, sender=CatalogEntry)
+def remove_from_suggest_index(sender, instance, **kwargs):
+    suggest.entry_deleted(instance.pk)
+
+
+# ======================
+# IMAGE DERIVATIVES
+# ======================
+@receiver(post_save)
+def generate_image_derivatives(sender, instance, raw=False, **kwargs):
+    if raw or sender._meta.label_lower not in images.IMAGE_FIELDS:
+        return
+    transaction.on_commit(lambda: images.schedule_for_instance(instance))
+
+
+# ======================
+# DASHBOARD ROLLUPS
+# ======================
+@receiver(post_save)
+@receiver(post_delete)
+def refresh_daily_rollup(sender, instance, raw=False, **kwargs):
+    source = rollups.ROLLUP_SOURCES.get(sender)
+    if source and not raw:
+        rollups.schedule_refresh(getattr(instance, source[0]))
+
+
+# ======================
+# LIVE DASHBOARD
+# ======================
+# Connected after the rollup receiver so its on_commit refresh runs first.
+@receiver(post_save)
+def publish_live_metrics(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        live.model_changed(sender, instance, created)
+
+
+@receiver(post_delete)
+def publish_live_metrics_on_delete(sender, instance, **kwargs):
+    live.model_changed(sender, instance)
+
+
+# ======================
+# GUEST CART MERGE
+# ======================
+@receiver(user_logged_in)
+def merge_guest_cart(sender, request, user, **kwargs):
+    if request is not None and hasattr(request, 'session'):
+        cart.merge_at_login(request, user)
+
+
+@receiver(user_logged_out)
+def save_cart_at_logout(sender, request, user, **kwargs):
+    # Logging out flushes the session, so keep the basket for the next login.
+    if user is not None and request is not None and hasattr(request, 'session'):
+        cart.persist(user, cart.get_cart(request).lines())
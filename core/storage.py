@@ -0,0 +1,112 @@
+import hashlib
+import os
+import threading
+
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.utils.functional import cached_property
+
+
+# ======================
+# CONTENT-ADDRESSED MEDIA STORAGE
+# ======================
+# Uploads are stored once under cas/<aa>/<sha256><ext>, whatever upload_to
+# says, so byte-identical files share one blob and a name never changes
+# content (safe to cache forever). delete() only removes a blob once no
+# FileField/ImageField row references it; blobs released by FieldFile.delete()
+# (whose own row still counts) are collected by `dedupe_media --gc`.
+
+CAS_PREFIX = 'cas'
+HASH_CHUNK = 64 * 1024
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks(HASH_CHUNK):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hashed_name(name, digest):
+    ext = os.path.splitext(name)[1].lower()
+    return f'{CAS_PREFIX}/{digest[:2]}/{digest}{ext}'
+
+
+# Files whose names are derived from the row rather than the upload (see
+# barcodes.barcode_path); they are written through .raw and must keep them.
+FIXED_NAME_FIELDS = {('core.product', 'barcode_image')}
+
+
+def file_fields():
+    """Yield (model, field) for every content-addressed FileField/ImageField."""
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.FileField) and (model._meta.label_lower, field.name) not in FIXED_NAME_FIELDS:
+                yield model, field
+
+
+def blob_refcount(name):
+    return sum(
+        model._default_manager.filter(**{field.name: name}).count()
+        for model, field in file_fields()
+    )
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    @cached_property
+    def raw(self):
+        """Plain storage over the same directory, for files that must keep the
+        exact name they are given (e.g. image derivatives named after a blob).
+
+        Built from the constructor arguments rather than the resolved values,
+        so unset ones keep following MEDIA_ROOT/MEDIA_URL like this storage does.
+        """
+        return FileSystemStorage(
+            location=self._location,
+            base_url=self._base_url,
+            file_permissions_mode=self._file_permissions_mode,
+            directory_permissions_mode=self._directory_permissions_mode,
+        )
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = hashed_name(name, content_hash(content))
+        if not self.exists(name):
+            self._write_blob(name, content)
+        return name
+
+    def _write_blob(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+        # Two uploads of the same bytes may race here; both write identical
+        # content, so whichever rename lands last is equally correct.
+        tmp_path = f'{full_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            for chunk in content.chunks():
+                f.write(chunk)
+        if self.file_permissions_mode is not None:
+            os.chmod(tmp_path, self.file_permissions_mode)
+        os.replace(tmp_path, full_path)
+
+    def delete(self, name):
+        if name and name.startswith(f'{CAS_PREFIX}/'):
+            if blob_refcount(name) > 0:
+                return
+            from .images import delete_derivatives
+            delete_derivatives(name, storage=self.raw)
+        super().delete(name)
@@ -0,0 +1,153 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.db import transaction
+
+from .caching import bump_version, get_versions
+from .models import CatalogEntry
+
+
+# ======================
+# TYPEAHEAD PREFIX INDEX
+# ======================
+# Every worker keeps a sorted list of (normalized title suffix, entry id)
+# built from CatalogEntry, which already mirrors Product and the four legacy
+# catalogs. A title is indexed at each word boundary so "rose" also finds
+# "Red Rose Bouquet".
+#
+# A save or delete bumps the shared version once it commits. The worker that
+# made the change patches its own index in place when it was current before
+# the bump; any other worker (or a stale one) rebuilds on its next lookup.
+# Only one thread per worker rebuilds at a time, and the others keep serving
+# the old index meanwhile. The cache has no compare-and-set, so a bump from
+# another worker landing in the same instant could be overwritten; the index
+# is also rebuilt once it is MAX_INDEX_AGE seconds old to bound that.
+
+VERSION_LABEL = 'core.catalogentry'
+
+
+def normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+def _keys(title):
+    words = normalize(title).split(' ')
+    return {' '.join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+MAX_INDEX_AGE = 600
+
+
+class PrefixIndex:
+    def __init__(self):
+        self.keys = []          # sorted [(key, entry_id)]
+        self.entries = {}       # entry_id -> suggestion dict
+        self.version = None
+        self.built_at = 0.0
+        self.lock = threading.Lock()            # guards version/keys/entries swaps
+        self.rebuild_lock = threading.Lock()    # one rebuild at a time
+
+    def is_current(self, version):
+        return self.version == version and time.monotonic() - self.built_at < MAX_INDEX_AGE
+
+    def rebuild(self, version):
+        entries = {}
+        keys = []
+        for entry in CatalogEntry.objects.only('id', 'kind', 'object_id', 'title').iterator(chunk_size=2000):
+            entries[entry.id] = _suggestion(entry)
+            keys.extend((key, entry.id) for key in _keys(entry.title))
+        keys.sort()
+        with self.lock:
+            self.entries, self.keys, self.version = entries, keys, version
+            self.built_at = time.monotonic()
+
+    def patch(self, entry_id, suggestion, version):
+        """Replace (or, with suggestion=None, drop) one entry and adopt `version`.
+
+        Copy-on-write, so lookups running on another thread keep a consistent list.
+        """
+        with self.lock:
+            keys = [item for item in self.keys if item[1] != entry_id]
+            entries = dict(self.entries)
+            entries.pop(entry_id, None)
+            if suggestion is not None:
+                entries[entry_id] = suggestion
+                for key in _keys(suggestion['title']):
+                    insort(keys, (key, entry_id))
+            self.entries, self.keys, self.version = entries, keys, version
+
+    def lookup(self, prefix, limit):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        keys = self.keys
+        seen = set()
+        results = []
+        i = bisect_left(keys, (prefix,))
+        while i < len(keys) and len(results) < limit:
+            key, entry_id = keys[i]
+            if not key.startswith(prefix):
+                break
+            if entry_id not in seen:
+                seen.add(entry_id)
+                suggestion = self.entries.get(entry_id)
+                if suggestion is not None:
+                    results.append(suggestion)
+            i += 1
+        return results
+
+
+def _suggestion(entry):
+    return {
+        'title': entry.title,
+        'kind': entry.kind,
+        'url': entry.get_absolute_url(),
+    }
+
+
+_index = PrefixIndex()
+
+
+def _current_version():
+    return get_versions([VERSION_LABEL])[VERSION_LABEL]
+
+
+def suggest(prefix, limit=10):
+    """Return up to `limit` suggestions whose title (or a word in it) starts with `prefix`."""
+    version = _current_version()
+    if not _index.is_current(version):
+        # Serve the old index while another thread rebuilds, unless there is none yet.
+        if _index.rebuild_lock.acquire(blocking=_index.version is None):
+            try:
+                version = _current_version()
+                if not _index.is_current(version):
+                    _index.rebuild(version)
+            finally:
+                _index.rebuild_lock.release()
+    return _index.lookup(prefix, limit)
+
+
+def _apply_local(entry_id, suggestion):
+    # Holding the rebuild lock keeps a concurrent rebuild from swapping in a
+    # snapshot between the version check and the patch.
+    with _index.rebuild_lock:
+        before = _current_version()
+        after = bump_version(VERSION_LABEL)
+        if _index.version == before:
+            _index.patch(entry_id, suggestion, after)
+
+
+def entry_saved(entry):
+    # After commit, so no worker can rebuild from a snapshot without the change.
+    suggestion = _suggestion(entry)
+    transaction.on_commit(lambda: _apply_local(entry.id, suggestion))
+
+
+def entry_deleted(entry_id):
+    transaction.on_commit(lambda: _apply_local(entry_id, None))
+
+
+def invalidate():
+    """Force every worker to rebuild, e.g. after a bulk write that sent no signals."""
+    bump_version(VERSION_LABEL)
@@ -0,0 +1,52 @@
+from django import template
+from django.utils.html import format_html
+
+from core.images import available_widths, derivative_name
+
+register = template.Library()
+
+# Matches the 1/2/3/4-column product grids used across the catalog pages.
+DEFAULT_SIZES = '(min-width: 1024px) 25vw, (min-width: 768px) 33vw, (min-width: 640px) 50vw, 100vw'
+
+
+def _srcset(image, widths, ext):
+    return ', '.join(
+        f'{image.storage.url(derivative_name(image.name, width, ext))} {width}w'
+        for width in widths
+    )
+
+
+@register.simple_tag
+def responsive_image(image, alt='', css_class='', sizes=DEFAULT_SIZES, loading='lazy'):
+    """Render <picture> with WebP and JPEG srcsets, or a plain <img> if no derivatives exist yet."""
+    if not image:
+        return ''
+    widths = available_widths(image.name, image.storage)
+    if not widths:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async">',
+            image.url, alt, css_class, loading,
+        )
+    return format_html(
+        '<picture class="contents">'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" loading="{}" decoding="async">'
+        '</picture>',
+        _srcset(image, widths, 'webp'), sizes,
+        image.url, _srcset(image, widths, 'jpg'), sizes, alt, css_class, loading,
+    )
+
+
+@register.simple_tag
+def image_url(image, width, ext='jpg'):
+    """URL of the largest derivative no wider than `width`, else the original.
+
+    Defaults to the JPEG copy, which every browser can show; pass ext='webp'
+    only where a fallback is provided alongside it.
+    """
+    if not image:
+        return ''
+    fitting = [w for w in available_widths(image.name, image.storage) if w <= int(width)]
+    if not fitting:
+        return image.url
+    return image.storage.url(derivative_name(image.name, fitting[-1], ext))
@@ -1,3 +1,632 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.db import DatabaseError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from PIL import Image
+
+from . import cart, images, rollups, search, suggest
+from .barcodes import DEFAULT_BARCODE_TYPE, barcode_path
+from .caching import clear_memo, get_versions
+from .context_processors import site_settings
+from .codes import HiLoAllocator, format_code
+from .pagination import CursorPaginator
+from .storage import CAS_PREFIX, file_fields
+from .catalog import project_many
+from .models import CartItem, Carpet, CatalogEntry, CodeSequence, DailyRollup, Order, Payment, Product, ProductCategory, SiteSettings
+
+# Tests that depend on fragment/memo versions get a private cache, so
+# nothing leaks between runs through the on-disk default cache.
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def make_products(count, price='10.00', **fields):
+    """Insert products with bulk_create. Their barcode paths are already set, so
+    a later save() doesn't render one."""
+    category, _ = ProductCategory.objects.get_or_create(name='Test')
+    return Product.objects.bulk_create([
+        Product(name=f'Product {i}', category=category, price=Decimal(price),
+                main_image='products/test.jpg', code=f'T{i}',
+                barcode_image=barcode_path(f'T{i}', DEFAULT_BARCODE_TYPE), **fields)
+        for i in range(count)
+    ])
+
+
+class BarcodeViewTests(TestCase):
+    def test_renders_png(self):
+        response = self.client.get(reverse('barcode', args=['code128', 'ABC-123', 'png']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('ETag', response)
+
+    def test_not_modified(self):
+        url = reverse('barcode', args=['code128', 'ABC-123', 'svg'])
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_type_is_404(self):
+        response = self.client.get('/barcode/nosuchtype/123.png')
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_code_is_not_reflected(self):
+        response = self.client.get('/barcode/ean13/%3Csvg%20onload=alert(1)%3E.png')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertNotIn(b'<svg', response.content)
+        self.assertNotIn(b'onload', response.content)
+
+
+class HiLoAllocatorTests(TransactionTestCase):
+    def test_allocators_never_overlap(self):
+        first = HiLoAllocator('test', block_size=5)
+        second = HiLoAllocator('test', block_size=5)
+        values = [allocator.allocate() for _ in range(12) for allocator in (first, second)]
+        self.assertEqual(len(values), len(set(values)))
+        self.assertEqual(CodeSequence.objects.get(name='test').next_value, 1 + 5 * 6)
+
+    def test_block_reserved_in_rolled_back_transaction_is_not_kept(self):
+        first = HiLoAllocator('test', block_size=5)
+        try:
+            with transaction.atomic():
+                rolled_back = first.allocate()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        # The sequence bump was undone, so the value may be handed out
+        # again, but never twice by live allocators.
+        second = HiLoAllocator('test', block_size=5)
+        values = [allocator.allocate() for _ in range(6) for allocator in (first, second)]
+        self.assertEqual(len(values), len(set(values)))
+        self.assertIn(rolled_back, values)
+
+    def test_ean13_codes_are_valid(self):
+        self.assertEqual(format_code(1, 'ean13'), '2000000000015')
+        self.assertEqual(format_code(7, 'code128'), '7')
+
+
+class CartLineApiTests(TestCase):
+    def setUp(self):
+        self.product, self.other = make_products(2)
+        self.url = reverse('cart_line_api', args=[self.product.id])
+        self.client.get(reverse('add_to_cart', args=[self.product.id]))
+        self.client.get(reverse('add_to_cart', args=[self.other.id]))
+
+    def post(self, action, **data):
+        return self.client.post(self.url, {'action': action, **data})
+
+    def test_increment_returns_line_and_cart_totals(self):
+        data = self.post('increment').json()
+        self.assertEqual(data['quantity'], 2)
+        self.assertEqual(Decimal(data['line_total']), Decimal('20.00'))
+        self.assertEqual(Decimal(data['subtotal']), Decimal('30.00'))
+        self.assertEqual(Decimal(data['grand_total']), Decimal('30.00') + cart.DELIVERY_CHARGE)
+        self.assertEqual(data['units'], 3)
+
+    def test_decrement_stops_at_one(self):
+        self.post('set', quantity=2)
+        self.assertEqual(self.post('decrement').json()['quantity'], 1)
+        self.assertEqual(self.post('decrement').json()['quantity'], 1)
+
+    def test_remove(self):
+        data = self.post('remove').json()
+        self.assertEqual(data['quantity'], 0)
+        self.assertEqual(data['units'], 1)
+
+    def test_set(self):
+        data = self.post('set', quantity=5).json()
+        self.assertEqual(data['quantity'], 5)
+        self.assertEqual(data['units'], 6)
+
+    def test_set_rejects_out_of_range_quantities(self):
+        for quantity in ('0', '-1', 'abc', '', str(cart.MAX_LINE_QUANTITY + 1), str(10 ** 30)):
+            with self.subTest(quantity=quantity):
+                self.assertEqual(self.post('set', quantity=quantity).status_code, 400)
+        self.assertEqual(self.client.get(reverse('cart_summary')).json()['units'], 2)
+
+    def test_unknown_action(self):
+        self.assertEqual(self.post('explode').status_code, 400)
+
+    def test_lines_not_in_cart_are_left_alone(self):
+        self.client.post(reverse('cart_line_api', args=[self.other.id]), {'action': 'remove'})
+        data = self.client.post(reverse('cart_line_api', args=[self.other.id]), {'action': 'increment'}).json()
+        self.assertEqual(data['quantity'], 0)
+        self.assertEqual(data['units'], 1)
+
+    def test_get_not_allowed(self):
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+    def test_add_is_capped(self):
+        self.post('set', quantity=cart.MAX_LINE_QUANTITY)
+        self.assertEqual(self.post('increment').json()['quantity'], cart.MAX_LINE_QUANTITY)
+
+
+@override_settings(CART_BACKEND='core.cart.CacheCart')
+class CacheCartTests(TestCase):
+    def test_reading_an_empty_cart_does_not_start_a_session(self):
+        self.client.get(reverse('cart_summary'))
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, self.client.cookies)
+
+    def test_lines_survive_between_requests(self):
+        product, = make_products(1)
+        self.client.get(reverse('add_to_cart', args=[product.id]))
+        self.client.get(reverse('add_to_cart', args=[product.id]))
+        self.assertEqual(self.client.get(reverse('cart_summary')).json()['units'], 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        # Ties on price check that the id tiebreaker neither skips nor repeats rows.
+        self.products = make_products(7)
+        Product.objects.filter(id__in=[p.id for p in self.products[::2]]).update(price=Decimal('5.00'))
+
+    def walk(self, paginator):
+        ids, page = [], paginator.get_page('')
+        while True:
+            ids.extend(p.id for p in page)
+            if not page.next_cursor:
+                return ids, page
+            page = paginator.get_page(page.next_cursor)
+
+    def test_pages_cover_every_row_once_in_order(self):
+        paginator = CursorPaginator(Product.objects.all(), 3, sort_key='price')
+        ids, _ = self.walk(paginator)
+        expected = list(Product.objects.order_by('price', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_previous_cursor_returns_the_previous_page(self):
+        paginator = CursorPaginator(Product.objects.all(), 3)
+        first = list(paginator.get_page(''))
+        second = paginator.get_page(paginator.get_page('').next_cursor)
+        self.assertTrue(second.has_previous)
+        self.assertEqual(list(paginator.get_page(second.previous_cursor)), first)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        paginator = CursorPaginator(Product.objects.all(), 3)
+        page = paginator.get_page('not-a-cursor')
+        self.assertEqual(page.key, '')
+        self.assertEqual(list(page), list(paginator.get_page('')))
+
+    def test_page_key_depends_on_position_only(self):
+        paginator = CursorPaginator(Product.objects.all(), 3)
+        token = paginator.get_page('').next_cursor
+        self.assertEqual(paginator.get_page(token).key, f'next:{self.products[-3].id}:{self.products[-3].id}')
+
+    def test_home_ignores_bogus_cursors(self):
+        response = self.client.get(reverse('home'), {'cursor': '<junk>'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['products'].key, '')
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        rose, lily, vase = make_products(3)
+        Product.objects.filter(id=rose.id).update(name='Red Rose Bouquet', description='Fresh flowers')
+        Product.objects.filter(id=lily.id).update(name='White Lily', description='Pairs well with a rose')
+        Product.objects.filter(id=vase.id).update(name='Glass <Vase>', description='Holds flowers')
+        project_many('product', Product.objects.all(), {p.category_id: 'Test' for p in Product.objects.all()})
+        Carpet.objects.create(title='Rose Garden Rug', description='Woven', price=Decimal('99'), image='carpets/rug.jpg')
+
+    def test_match_query_requires_every_word_as_prefix(self):
+        self.assertEqual(search.build_match_query('red ros'), '"red"* "ros"*')
+        # Operators and quotes are never passed through to FTS5.
+        self.assertEqual(search.build_match_query('" OR *'), '"OR"*')
+
+    def test_title_hits_rank_above_description_hits(self):
+        titles = [e.title for e in search.search_catalog('rose')]
+        self.assertCountEqual(titles[:2], ['Red Rose Bouquet', 'Rose Garden Rug'])
+        self.assertEqual(titles[2:], ['White Lily'])
+
+    def test_prefix_and_highlight(self):
+        result, = search.search_catalog('bouq')
+        self.assertIn('<mark>Bouquet</mark>', result.name_highlight)
+
+    def test_highlight_escapes_titles(self):
+        result, = search.search_catalog('vase')
+        self.assertIn('&lt;<mark>Vase</mark>&gt;', result.name_highlight)
+
+    def test_empty_query(self):
+        self.assertEqual(search.search_catalog('  '), [])
+        self.assertEqual(search.search_catalog('!!'), [])
+
+    def test_catalog_search_spans_kinds(self):
+        kinds = {entry.kind for entry in search.search_catalog('rose')}
+        self.assertEqual(kinds, {'product', 'carpet'})
+
+    def test_falls_back_to_like_when_the_index_is_unavailable(self):
+        with mock.patch.object(search, '_fts_hits', side_effect=DatabaseError):
+            titles = {e.title for e in search.search_catalog('rose')}
+        self.assertEqual(titles, {'Red Rose Bouquet', 'White Lily', 'Rose Garden Rug'})
+
+    def test_search_view(self):
+        response = self.client.get(reverse('search'), {'q': 'rug'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([e.title for e in response.context['results']], ['Rose Garden Rug'])
+
+
+class LabelSheetAdminTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'a@example.com', 'pw'))
+        self.products = make_products(3)
+
+    def run_action(self, action):
+        return self.client.post(reverse('admin:core_product_changelist'), {
+            'action': action,
+            '_selected_action': [p.pk for p in self.products],
+        })
+
+    def test_small_selection_streams_a_pdf(self):
+        response = self.run_action('print_label_sheet_pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+    def test_large_selection_points_to_the_command(self):
+        with mock.patch('core.admin.ADMIN_LABEL_LIMIT', 2):
+            response = self.run_action('print_label_sheet_png')
+        self.assertRedirects(response, reverse('admin:core_product_changelist'), fetch_redirect_response=False)
+        self.assertFalse(hasattr(response, 'streaming_content'))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SuggestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(suggest, '_index', suggest.PrefixIndex())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rug = Carpet.objects.create(title='Rose Garden Rug', description='', price=Decimal('99'), image='c.jpg')
+        self.titles('ro')
+
+    def titles(self, prefix):
+        return [s['title'] for s in suggest.suggest(prefix)]
+
+    def test_matches_any_word_prefix(self):
+        self.assertEqual(self.titles('gard'), ['Rose Garden Rug'])
+        self.assertEqual(self.titles('x'), [])
+
+    def test_local_save_patches_the_index_without_a_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Carpet.objects.create(title='Rosewood Mat', description='', price=Decimal('5'), image='m.jpg')
+        with mock.patch.object(suggest.PrefixIndex, 'rebuild') as rebuild:
+            self.assertEqual(self.titles('rose'), ['Rose Garden Rug', 'Rosewood Mat'])
+        rebuild.assert_not_called()
+
+    def test_local_delete_patches_the_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rug.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles('rose'), [])
+
+    def test_change_from_another_worker_triggers_a_rebuild(self):
+        CatalogEntry.objects.filter(kind='carpet').update(title='Tulip Rug')
+        suggest.invalidate()
+        self.assertEqual(self.titles('tul'), ['Tulip Rug'])
+
+    def test_stale_worker_rebuilds_instead_of_patching(self):
+        suggest.invalidate()
+        with self.captureOnCommitCallbacks(execute=True):
+            Carpet.objects.create(title='Rosewood Mat', description='', price=Decimal('5'), image='m.jpg')
+        with mock.patch.object(suggest.PrefixIndex, 'rebuild', autospec=True,
+                               side_effect=suggest.PrefixIndex.rebuild) as rebuild:
+            self.assertEqual(self.titles('rose'), ['Rose Garden Rug', 'Rosewood Mat'])
+        rebuild.assert_called_once()
+
+
+class CartPersistenceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('shopper', password='pw')
+        self.a, self.b, self.c = make_products(3)
+
+    def saved(self):
+        return dict(CartItem.objects.filter(user=self.user).values_list('product_id', 'quantity'))
+
+    def test_persist_replaces_saved_lines(self):
+        CartItem.objects.create(user=self.user, product=self.a, quantity=5)
+        CartItem.objects.create(user=self.user, product=self.c, quantity=1)
+        cart.persist(self.user, {self.a.id: 2, self.b.id: 1})
+        self.assertEqual(self.saved(), {self.a.id: 2, self.b.id: 1})
+
+    def test_persist_drops_unknown_products_and_clamps(self):
+        cart.persist(self.user, {self.a.id: 10 ** 6, 999999: 1, self.b.id: 0})
+        self.assertEqual(self.saved(), {self.a.id: cart.MAX_LINE_QUANTITY})
+
+    def test_persist_twice_keeps_one_row_per_product(self):
+        cart.persist(self.user, {self.a.id: 1})
+        cart.persist(self.user, {self.a.id: 3})
+        self.assertEqual(CartItem.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(self.saved(), {self.a.id: 3})
+
+    def test_login_merges_guest_cart_with_saved_cart(self):
+        CartItem.objects.create(user=self.user, product=self.a, quantity=3)
+        self.client.get(reverse('add_to_cart', args=[self.a.id]))
+        self.client.get(reverse('add_to_cart', args=[self.b.id]))
+        self.client.post(reverse('login'), {'username': 'shopper', 'password': 'pw'})
+        expected = {self.a.id: 3, self.b.id: 1}
+        self.assertEqual(self.saved(), expected)
+        summary = self.client.get(reverse('cart_summary')).json()
+        self.assertEqual({item['product_id']: item['quantity'] for item in summary['items']}, expected)
+
+    def test_guest_checkout_resumes_after_login(self):
+        self.client.get(reverse('add_to_cart', args=[self.a.id]))
+        response = self.client.post(reverse('checkout'))
+        self.assertRedirects(response, f"{reverse('login')}?next={reverse('checkout')}")
+        response = self.client.post(
+            f"{reverse('login')}?next={reverse('checkout')}",
+            {'username': 'shopper', 'password': 'pw'}, follow=True,
+        )
+        self.assertEqual(
+            response.redirect_chain, [(reverse('checkout'), 302), (reverse('cart_view'), 302)],
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([line.product.id for line in response.context['cart_items']], [self.a.id])
+        response = self.client.post(reverse('checkout'))
+        order = Order.objects.get(user=self.user, status=cart.PENDING)
+        self.assertRedirects(response, reverse('checkout_address', args=[order.id]), fetch_redirect_response=False)
+
+    def test_checkout_builds_pending_order_from_cart(self):
+        self.client.post(reverse('login'), {'username': 'shopper', 'password': 'pw'})
+        self.client.get(reverse('add_to_cart', args=[self.b.id]))
+        self.client.get(reverse('add_to_cart', args=[self.b.id]))
+        self.client.post(reverse('checkout'))
+        order = Order.objects.get(user=self.user, status=cart.PENDING)
+        self.assertEqual(list(order.items.values_list('product_id', 'quantity')), [(self.b.id, 2)])
+
+
+@override_settings(CART_BACKEND='core.cart.DatabaseCart')
+class DatabaseCartTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('shopper', password='pw')
+        self.product, = make_products(1)
+        self.client.force_login(self.user)
+        self.url = reverse('cart_line_api', args=[self.product.id])
+
+    def quantity(self):
+        return CartItem.objects.get(user=self.user, product=self.product).quantity
+
+    def test_add_upserts_a_single_row(self):
+        for _ in range(3):
+            self.client.get(reverse('add_to_cart', args=[self.product.id]))
+        self.assertEqual(CartItem.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(self.quantity(), 3)
+
+    def test_add_item_is_capped(self):
+        cart.add_item(self.user.id, self.product.id, cart.MAX_LINE_QUANTITY)
+        self.assertEqual(cart.add_item(self.user.id, self.product.id, 5), cart.MAX_LINE_QUANTITY)
+
+    def test_line_actions(self):
+        self.client.get(reverse('add_to_cart', args=[self.product.id]))
+        self.assertEqual(self.client.post(self.url, {'action': 'set', 'quantity': 4}).json()['quantity'], 4)
+        self.assertEqual(self.client.post(self.url, {'action': 'decrement'}).json()['quantity'], 3)
+        self.assertEqual(self.quantity(), 3)
+        self.assertEqual(self.client.post(self.url, {'action': 'remove'}).json()['units'], 0)
+        self.assertFalse(CartItem.objects.filter(user=self.user).exists())
+
+
+class MergeDuplicateCartItemsMigrationTests(TransactionTestCase):
+    before = [('core', '0048_dailyrollup')]
+    after = [('core', '0049_cartitem_unique_user_product')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicates_are_folded_into_the_oldest_row(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        user = apps.get_model('auth', 'User').objects.create(username='shopper')
+        category = apps.get_model('core', 'ProductCategory').objects.create(name='Test')
+        Product = apps.get_model('core', 'Product')
+        a, b = (Product.objects.create(name=name, category=category, price=1, code=name) for name in 'AB')
+        CartItem = apps.get_model('core', 'CartItem')
+        first = CartItem.objects.create(user=user, product=a, quantity=2)
+        CartItem.objects.create(user=user, product=a, quantity=3)
+        CartItem.objects.create(user=user, product=b, quantity=1)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        CartItem = executor.loader.project_state(self.after).apps.get_model('core', 'CartItem')
+        rows = sorted(CartItem.objects.values_list('id', 'product_id', 'quantity'))
+        self.assertEqual(rows[0], (first.id, a.id, 5))
+        self.assertEqual([row[1:] for row in rows], [(a.id, 5), (b.id, 1)])
+
+
+class CatalogBackfillMigrationTests(TransactionTestCase):
+    before = [('core', '0049_cartitem_unique_user_product')]
+    after = [('core', '0050_catalog_backfill_drop_product_fts')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_existing_rows_are_projected_and_indexed(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        category = apps.get_model('core', 'ProductCategory').objects.create(name='Bouquets')
+        product = apps.get_model('core', 'Product').objects.create(
+            name='Peony Bunch', category=category, price=12, code='P1', main_image='products/p.jpg',
+        )
+        apps.get_model('core', 'Carpet').objects.create(
+            title='Peony Runner', description='Woven', price=40, image='carpets/c.jpg',
+        )
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        entry = CatalogEntry.objects.get(kind='product', object_id=product.id)
+        self.assertEqual((entry.title, entry.category, entry.image.name), ('Peony Bunch', 'Bouquets', 'products/p.jpg'))
+        self.assertEqual({e.title for e in search.search_catalog('peony')}, {'Peony Bunch', 'Peony Runner'})
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE 'core_product_fts%%'")
+            self.assertEqual(cursor.fetchall(), [])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CacheInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_memo()
+
+    def test_product_edit_refreshes_home_grid_after_commit(self):
+        product, = make_products(1)
+        self.assertContains(self.client.get(reverse('home')), 'Product 0')
+        with self.captureOnCommitCallbacks(execute=True):
+            product.name = 'Renamed Bouquet'
+            product.save()
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Renamed Bouquet')
+        self.assertNotContains(response, 'Product 0')
+
+    def test_version_is_bumped_only_on_commit(self):
+        product, = make_products(1)
+        before = get_versions(['core.product'])['core.product']
+        with self.captureOnCommitCallbacks() as callbacks:
+            product.save()
+            self.assertEqual(get_versions(['core.product'])['core.product'], before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_versions(['core.product'])['core.product'], before)
+
+    def test_site_settings_memo_reloads_after_edit(self):
+        settings_row = SiteSettings.objects.create(site_name='Old Name', logo='logo/x.png')
+        self.assertEqual(site_settings(None)['site_settings'].site_name, 'Old Name')
+        with self.assertNumQueries(0):
+            site_settings(None)
+        with self.captureOnCommitCallbacks(execute=True):
+            settings_row.site_name = 'New Name'
+            settings_row.save()
+        self.assertEqual(site_settings(None)['site_settings'].site_name, 'New Name')
+
+    def test_new_derivatives_refresh_fragments(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = FileSystemStorage(location=root, base_url='/media/')
+            buffer = BytesIO()
+            Image.new('RGB', (700, 400), 'green').save(buffer, format='JPEG')
+            name = storage.save('hero/slide.jpg', ContentFile(buffer.getvalue()))
+            before = get_versions(['core.heroslide'])['core.heroslide']
+
+            images._generate_files('core.heroslide', [(name, storage)])
+            self.assertEqual(images.available_widths(name, storage), [320, 640])
+            after = get_versions(['core.heroslide'])['core.heroslide']
+            self.assertNotEqual(after, before)
+
+            # Nothing new written, nothing to refresh.
+            images._generate_files('core.heroslide', [(name, storage)])
+            self.assertEqual(get_versions(['core.heroslide'])['core.heroslide'], after)
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def carpet(self, image):
+        # update() rather than save(), so no signals or derivative jobs run.
+        carpet = Carpet.objects.create(title='Rug', description='', price=Decimal('1'), image='')
+        Carpet.objects.filter(pk=carpet.pk).update(image=image)
+        return carpet
+
+    def test_identical_uploads_share_one_blob(self):
+        first = default_storage.save('carpets/a.jpg', ContentFile(b'same bytes'))
+        second = default_storage.save('carpets/b.jpg', ContentFile(b'same bytes'))
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith(f'{CAS_PREFIX}/'))
+        self.assertNotEqual(default_storage.save('carpets/c.jpg', ContentFile(b'other')), first)
+
+    def test_blob_is_kept_while_a_row_references_it(self):
+        name = default_storage.save('carpets/a.jpg', ContentFile(b'bytes'))
+        carpet = self.carpet(name)
+        default_storage.delete(name)
+        self.assertTrue(default_storage.exists(name))
+        carpet.delete()
+        default_storage.delete(name)
+        self.assertFalse(default_storage.exists(name))
+
+    def test_dedupe_media_collapses_duplicates_and_collects_garbage(self):
+        for name, data in [('carpets/a.jpg', b'same'), ('carpets/b.jpg', b'same'), ('carpets/c.jpg', b'other')]:
+            default_storage.raw.save(name, ContentFile(data))
+        a, b, c = self.carpet('carpets/a.jpg'), self.carpet('carpets/b.jpg'), self.carpet('carpets/c.jpg')
+        orphan = default_storage.save('carpets/orphan.jpg', ContentFile(b'nobody uses me'))
+
+        call_command('dedupe_media', '--delete-originals', '--gc', stdout=StringIO(), stderr=StringIO())
+
+        a, b, c = (Carpet.objects.get(pk=obj.pk).image.name for obj in (a, b, c))
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+        self.assertTrue(default_storage.exists(a) and default_storage.exists(c))
+        self.assertFalse(default_storage.exists('carpets/a.jpg'))
+        self.assertFalse(default_storage.exists(orphan))
+
+    def test_barcodes_keep_their_fixed_names(self):
+        fields = {(model._meta.label_lower, field.name) for model, field in file_fields()}
+        self.assertIn(('core.product', 'main_image'), fields)
+        self.assertNotIn(('core.product', 'barcode_image'), fields)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('buyer', password='pw')
+        self.today = timezone.localdate()
+
+    def rollup(self, day=None):
+        return DailyRollup.objects.get(day=day or self.today)
+
+    def test_order_and_payment_changes_recompute_their_day(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(user=self.user)
+            payment = Payment.objects.create(user=self.user, order=order, amount=Decimal('120.00'))
+        row = self.rollup()
+        self.assertEqual((row.orders, row.payments, row.revenue), (1, 1, Decimal('0')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.status = 'paid'
+            payment.save()
+        self.assertEqual(self.rollup().revenue, Decimal('120.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.delete()
+        row = self.rollup()
+        self.assertEqual((row.orders, row.payments, row.revenue), (1, 0, Decimal('0')))
+
+    def test_rolled_back_change_leaves_rollup_untouched(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    Order.objects.create(user=self.user)
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.rollup().orders, 1)
+
+    def test_rebuild_recomputes_a_range(self):
+        yesterday = self.today - timedelta(days=1)
+        order = Order.objects.create(user=self.user)
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=1))
+        Order.objects.create(user=self.user)
+        DailyRollup.objects.all().delete()
+
+        self.assertEqual(rollups.rebuild(yesterday, self.today), 2)
+        self.assertEqual((self.rollup(yesterday).orders, self.rollup().orders), (1, 1))
+        self.assertEqual(rollups.totals()['orders'], 2)
@@ -1,6 +1,6 @@
 # core/urls.py
 
-from django.urls import path
+from django.urls import path, re_path
 from . import views
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.views import LogoutView
@@ -31,10 +31,13 @@ urlpatterns = [
     # 🛒 Cart functionality
     path('add-to-cart/<int:product_id>/', views.add_to_cart, name='add_to_cart'),
     path('cart/', views.cart_view, name='cart_view'),
-    path('remove-from-cart/<int:item_id>/', views.remove_from_cart, name='remove_from_cart'),
-    path('update-cart/<int:item_id>/', views.update_cart, name='update_cart'),
+    path('cart/summary.json', views.cart_summary, name='cart_summary'),
+    path('remove-from-cart/<int:product_id>/', views.remove_from_cart, name='remove_from_cart'),
+    path('update-cart/<int:product_id>/', views.update_cart, name='update_cart'),
+    path('cart/items/<int:product_id>.json', views.cart_line_api, name='cart_line_api'),
 
     # 💳 Checkout & Payment
+    path('checkout/', views.checkout, name='checkout'),
     path('checkout/address/<int:order_id>/', views.checkout_address, name='checkout_address'),
     path('checkout/payment/<int:order_id>/', views.checkout_payment, name='checkout_payment'),
     path('order-success/', views.order_success, name='order_success'),
@@ -50,14 +53,24 @@ urlpatterns = [
     path('sports/', views.sports_view, name='sports_view'),
     path('artificial-plants/', views.artificial_plants_view, name='artificial_plants_view'),
     
+    # Barcodes
+    re_path(r'^barcode/(?P<barcode_type>[a-z0-9]+)/(?P<code>[^/]{1,64})\.(?P<fmt>svg|png)$', views.barcode_view, name='barcode'),
+
+    # Resized media
+    path('media-resized/<int:width>x<int:height>/<path:path>', views.media_resized, name='media_resized'),
+
     # Invoice view
     path('invoice/<int:order_id>/', views.invoice_view, name='invoice_view'),
 
     # Admin dashboard
     path('admin-dashboard/', admin_views.admin_dashboard, name='admin_dashboard'),
+    path('admin-dashboard/stream/', admin_views.dashboard_stream, name='dashboard_stream'),
+    path('admin-dashboard/analytics/', admin_views.analytics_view, name='admin_analytics'),
+    path('admin-dashboard/analytics.json', admin_views.analytics_data, name='admin_analytics_data'),
     path("access-admin/", views.access_floral_admin, name="access_floral_admin"),
 
      path('search/', views.search_view, name='search'),
+     path('search/suggest/', views.search_suggest, name='search_suggest'),
 
      path('products/<int:pk>/', views.product_detail_view, name='product_detail')
 ]
\ No newline at end of file
@@ -1,19 +1,17 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_http_methods, require_POST
 from django.views.decorators.csrf import csrf_exempt
-from django.http import HttpResponse, JsonResponse, HttpResponseForbidden
-from django.core.paginator import Paginator
+from django.http import HttpResponse, JsonResponse, HttpResponseForbidden, HttpResponseBadRequest, HttpResponseNotModified, FileResponse, Http404
 from django.contrib.auth import logout, login
+from django.utils.functional import SimpleLazyObject
 import json
+import os
 import razorpay
 from decimal import Decimal
 import random
 import string
-import barcode
-from barcode.writer import ImageWriter
-from io import BytesIO
 from razorpay.errors import SignatureVerificationError
 
 # Import all your models and forms here
@@ -21,11 +19,18 @@ from .admin_views import admin_dashboard
 from .models import (
     SiteSettings, NavLink, HeroSlide, Product, ProductCategory,
     SecondaryHero, FooterLink, SocialLink, Event, Footer, CartItem,
-    Order, OrderItem, Payment, Invoice,
+    Order, Payment, Invoice,
     Carpet, GreenWall, SportsProduct, ArtificialPlant, ContactMessage,
-    AboutPage, Address
+    AboutPage, Address, BarcodeSettings
 )
 from .forms import CustomSignupForm, AddressForm
+from .caching import fragment_versions
+from . import cart
+from .pagination import CursorPaginator
+from .search import search_catalog
+from .suggest import suggest
+from .resize import get_resized
+from .barcodes import render_cached
 from django.contrib.auth.forms import UserCreationForm
 from django.conf import settings
 
@@ -33,20 +38,29 @@ from django.conf import settings
 # ======================
 # HOME VIEW
 # ======================
+HOME_PAGE_SIZE = 12
+# Product grid pages are cached per decoded cursor; expire them so deep
+# pages nobody revisits don't pile up in the cache.
+HOME_PRODUCTS_TIMEOUT = 60 * 60
+
 def home(request):
-    cart_items_count = CartItem.objects.filter(user=request.user).count() if request.user.is_authenticated else 0
+    cart_items_count = cart.get_cart(request).count()
+    # Querysets and lazy objects are only evaluated when a fragment misses
+    # the cache, so a warm home page runs no content queries at all.
     context = {
-        'site': SiteSettings.objects.first(),
+        'site': SimpleLazyObject(lambda: SiteSettings.objects.first()),
         'nav_links': NavLink.objects.all(),
         'hero_slides': HeroSlide.objects.all(),
-        'products': Product.objects.all(),
+        'products': CursorPaginator(Product.objects.select_related('category'), HOME_PAGE_SIZE).get_page(request.GET.get('cursor')),
+        'home_products_timeout': HOME_PRODUCTS_TIMEOUT,
         'categories': ProductCategory.objects.all(),
-        'secondary_hero': SecondaryHero.objects.first(),
+        'secondary_hero': SimpleLazyObject(lambda: SecondaryHero.objects.first()),
         'footer_links': FooterLink.objects.all(),
         'social_links': SocialLink.objects.all(),
         'events': Event.objects.all(),
-        'footer': Footer.objects.first(),
+        'footer': SimpleLazyObject(lambda: Footer.objects.first()),
         'cart_items_count': cart_items_count,
+        'fragment_versions': fragment_versions(),
     }
     return render(request, 'core/base.html', context)
 
@@ -54,63 +68,102 @@ def home(request):
 # ======================
 # CART MANAGEMENT
 # ======================
-@login_required
 def add_to_cart(request, product_id):
     product = get_object_or_404(Product, id=product_id)
-    cart_item, created = CartItem.objects.get_or_create(user=request.user, product=product)
-    if not created:
-        cart_item.quantity += 1
-        cart_item.save()
+    cart.get_cart(request).add(product.id)
     messages.success(request, "🛒 Item added to cart!")
     return redirect('cart_view')
 
-@login_required
 def cart_view(request):
-    cart_items = CartItem.objects.filter(user=request.user)
-    total = sum(item.product.price * item.quantity for item in cart_items)
-    delivery_charge = 50 if total > 0 else 0
-    grand_total = total + delivery_charge
-
-    order, created = Order.objects.get_or_create(user=request.user, status='pending')
-
-    for item in cart_items:
-        order_item, _ = OrderItem.objects.get_or_create(order=order, product=item.product)
-        if order_item.quantity != item.quantity:
-            order_item.quantity = item.quantity
-            order_item.save()
+    # Read-only: the pending order is only synced by the checkout view.
+    cart_items = cart.get_cart(request).items()
+    totals = cart.line_totals(cart_items)
 
     context = {
         'cart_items': cart_items,
-        'total': total,
-        'delivery_charge': delivery_charge,
-        'grand_total': grand_total,
-        'order': order
+        'total': totals['subtotal'],
+        'delivery_charge': totals['delivery_charge'],
+        'grand_total': totals['grand_total'],
     }
     return render(request, 'cart.html', context)
 
+def cart_summary(request):
+    return JsonResponse(cart.summary(request))
+
 @login_required
-def remove_from_cart(request, item_id):
-    get_object_or_404(CartItem, id=item_id, user=request.user).delete()
+@require_http_methods(['GET', 'POST'])
+def checkout(request):
+    if request.method == 'GET':
+        # A guest who POSTed here was sent to log in and comes back with a
+        # GET; their cart has been merged, so let them review and confirm it.
+        return redirect('cart_view')
+    lines = cart.get_cart(request).lines()
+    if not lines:
+        messages.error(request, "Your cart is empty. Please add items before proceeding to checkout.")
+        return redirect('cart_view')
+    cart.persist(request.user, lines)
+    order = cart.sync_pending_order(request.user)
+    return redirect('checkout_address', order_id=order.id)
+
+def remove_from_cart(request, product_id):
+    cart.get_cart(request).remove(product_id)
     messages.success(request, "Item removed from cart.")
     return redirect('cart_view')
 
-@require_POST
-@login_required
-def update_cart(request, item_id):
-    cart_item = get_object_or_404(CartItem, id=item_id)
-    action = request.POST.get('action')
+def _change_cart_line(backend, product_id, action, quantity=None):
+    """Apply one cart-page action to a line already in the cart; return its new quantity."""
+    current = backend.lines().get(product_id, 0)
+    if not current:
+        return 0
     if action == 'increment':
-        cart_item.quantity += 1
-    elif action == 'decrement' and cart_item.quantity > 1:
-        cart_item.quantity -= 1
-    cart_item.save()
+        return backend.add(product_id)
+    if action == 'decrement':
+        return backend.decrement(product_id)
+    if action == 'remove':
+        backend.remove(product_id)
+        return 0
+    if action == 'set' and quantity is not None:
+        return backend.set(product_id, quantity)
+    return current
+
+@require_POST
+def update_cart(request, product_id):
+    _change_cart_line(cart.get_cart(request), product_id, request.POST.get('action'))
     return redirect('cart_view')
 
+@require_POST
+def cart_line_api(request, product_id):
+    # JSON twin of update_cart/remove_from_cart for the cart page's fetch() calls.
+    action = request.POST.get('action')
+    quantity = None
+    if action == 'set':
+        try:
+            quantity = int(request.POST.get('quantity', ''))
+        except ValueError:
+            quantity = 0
+        if not 1 <= quantity <= cart.MAX_LINE_QUANTITY:
+            return JsonResponse(
+                {'error': f'quantity must be a whole number from 1 to {cart.MAX_LINE_QUANTITY}'}, status=400,
+            )
+    elif action not in ('increment', 'decrement', 'remove'):
+        return JsonResponse({'error': 'unknown action'}, status=400)
+
+    backend = cart.get_cart(request)
+    quantity = _change_cart_line(backend, product_id, action, quantity)
+    items = backend.items()
+    line = next((item for item in items if item.product.id == product_id), None)
+    return JsonResponse({
+        **cart.line_totals(items),
+        'product_id': product_id,
+        'quantity': quantity if line else 0,
+        'line_total': line.line_total if line else 0,
+    })
+
 # ======================
 # HELPER FUNCTIONS
 # ======================
 def compute_order_total(order):
-    return sum(item.product.price * item.quantity for item in order.items.all())
+    return cart.order_totals(order)['subtotal']
 
 def generate_invoice_number():
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=10))
@@ -118,12 +171,12 @@ def generate_invoice_number():
 def create_invoice_for_order(order):
     if hasattr(order, 'invoice'):
         return order.invoice
-    total_amount = sum(item.total_price for item in order.items.all())
+    total_amount = compute_order_total(order)
     tax = total_amount * Decimal('0.10')
     return Invoice.objects.create(
         order=order,
         invoice_number=generate_invoice_number(),
-        billing_address=order.address,
+        billing_address=order.delivery_address,
         total_amount=total_amount + tax,
         tax=tax,
     )
@@ -179,9 +232,10 @@ def checkout_payment(request, order_id):
         return redirect('checkout_address', order_id=order.id)
 
     # Calculate totals
-    subtotal = sum(item.product.price * item.quantity for item in order.items.all())
-    delivery_charge = 50
-    grand_total = subtotal + delivery_charge
+    totals = cart.order_totals(order)
+    subtotal = totals['subtotal']
+    delivery_charge = totals['delivery_charge']
+    grand_total = totals['grand_total']
     amount_in_paise = int(grand_total * 100)  # Razorpay expects paise
 
     # Initialize Razorpay client
@@ -263,6 +317,7 @@ def payment_verify(request):
     order.save()
     create_invoice_for_order(order)
     CartItem.objects.filter(user=request.user).delete()
+    cart.get_cart(request).clear()
     return JsonResponse({"status": "success"})
 
 
@@ -296,8 +351,9 @@ def invoice_view(request, order_id):
     order = get_object_or_404(Order, id=order_id)
     return render(request, 'core/invoice.html', {
         'order': order,
-        'items': order.items.all(),
-        'total': sum(item.total_price for item in order.items.all()),
+        'items': cart.with_line_totals(order.items.all()),
+        'total': compute_order_total(order),
+        'barcode_type': BarcodeSettings.current_type(),
     })
 
 @login_required
@@ -352,20 +408,22 @@ def edit_profile_view(request):
 # ======================
 # PRODUCT VIEWS
 # ======================
+CATALOG_PAGE_SIZE = 6
+
 def carpet_view(request):
-    page_obj = Paginator(Carpet.objects.all(), 6).get_page(request.GET.get('page'))
+    page_obj = CursorPaginator(Carpet.objects.all(), CATALOG_PAGE_SIZE).get_page(request.GET.get('cursor'))
     return render(request, 'core/carpet.html', {'page_obj': page_obj})
 
 def greenwalls_view(request):
-    page_obj = Paginator(GreenWall.objects.all().order_by('-id'), 6).get_page(request.GET.get('page'))
+    page_obj = CursorPaginator(GreenWall.objects.all(), CATALOG_PAGE_SIZE).get_page(request.GET.get('cursor'))
     return render(request, 'core/greenwalls.html', {'page_obj': page_obj})
 
 def sports_view(request):
-    page_obj = Paginator(SportsProduct.objects.all(), 6).get_page(request.GET.get('page'))
+    page_obj = CursorPaginator(SportsProduct.objects.all(), CATALOG_PAGE_SIZE).get_page(request.GET.get('cursor'))
     return render(request, 'core/sports.html', {'page_obj': page_obj})
 
 def artificial_plants_view(request):
-    page_obj = Paginator(ArtificialPlant.objects.all(), 6).get_page(request.GET.get('page'))
+    page_obj = CursorPaginator(ArtificialPlant.objects.all(), CATALOG_PAGE_SIZE).get_page(request.GET.get('cursor'))
     return render(request, 'artificial_plants.html', {'products': page_obj})
 
 # ======================
@@ -388,11 +446,49 @@ def contact_view(request):
 # ======================
 # BARCODE GENERATION
 # ======================
+BARCODE_TYPES = {choice for choice, _ in BarcodeSettings.BARCODE_TYPES}
+
+def barcode_view(request, barcode_type, code, fmt):
+    if barcode_type not in BARCODE_TYPES:
+        raise Http404("Unknown barcode type")
+    try:
+        data, content_type, etag = render_cached(code, barcode_type, fmt)
+    except Exception:
+        # Never echo the code back: it comes straight from the URL.
+        return HttpResponseBadRequest(f"Cannot encode this value as {barcode_type}.", content_type='text/plain')
+
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(data, content_type=content_type)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 def generate_barcode(request, code="123456789012"):
-    ean = barcode.get_barcode_class('ean13')(code, writer=ImageWriter())
-    buffer = BytesIO()
-    ean.write(buffer)
-    return HttpResponse(buffer.getvalue(), content_type='image/png')
+    return barcode_view(request, 'ean13', code, 'png')
+
+
+# ======================
+# ON-DEMAND IMAGE RESIZING
+# ======================
+def media_resized(request, width, height, path):
+    try:
+        target, content_type = get_resized(width, height, path)
+    except FileNotFoundError:
+        raise Http404("Image not found")
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    # The cache file name hashes the source's mtime, so it doubles as an ETag
+    # that changes when the upload is replaced; the URL itself doesn't.
+    etag = '"%s"' % os.path.splitext(os.path.basename(target))[0]
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(open(target, 'rb'), content_type=content_type)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age=86400'
+    return response
 
 
 # ======================
@@ -408,21 +504,26 @@ def order_success(request):
 
 
 def search_view(request):
-    query = request.GET.get('q')
-    results = []
-    if query:
-        # Filter products where the name or description contains the query
-        results = Product.objects.filter(name__icontains=query) | Product.objects.filter(description__icontains=query)
-        # You can add more fields to search on if you want
+    query = request.GET.get('q', '').strip()
+    results = search_catalog(query) if query else []
 
     context = {
         'query': query,
         'results': results,
+        'products': results,
     }
     return render(request, 'search_results.html', context)
 
 
 
+SUGGEST_LIMIT = 8
+
+def search_suggest(request):
+    query = request.GET.get('q', '')
+    return JsonResponse({'query': query, 'suggestions': suggest(query, SUGGEST_LIMIT)})
+
+
+
 def product_detail_view(request, pk):
     """
     Retrieves and displays a single product's details.
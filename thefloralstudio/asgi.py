@@ -2,6 +2,8 @@
 ASGI config for thefloralstudio project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn thefloralstudio.asgi:application``)
+to enable the admin dashboard's live metrics stream (core.admin_views.dashboard_stream).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -93,6 +93,18 @@ DATABASES = {
     }
 }
 
+# Cache
+# File-based so every worker process sees the same model version counters
+# (see core/caching.py); set CACHE_DIR to move it off the project tree.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_DIR', os.path.join(BASE_DIR, '.cache')),
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',},
@@ -114,5 +126,25 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'core/static')]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads are stored once per unique content under media/cas/, see core/storage.py
+STORAGES = {
+    'default': {'BACKEND': 'core.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+# On-demand resized media (/media-resized/<w>x<h>/<path>), see core/resize.py
+RESIZED_MEDIA_ROOT = os.getenv('RESIZED_MEDIA_ROOT', os.path.join(BASE_DIR, '.cache', 'resized'))
+RESIZED_MEDIA_MAX_BYTES = int(os.getenv('RESIZED_MEDIA_MAX_BYTES', 512 * 1024 * 1024))
+# (width, height) pairs /media-resized/ will render; 0 keeps the aspect ratio.
+RESIZED_MEDIA_SIZES = [(320, 0), (640, 0), (1024, 0), (1600, 0)]
+
+# Working carts live outside the database until login/checkout, see core/cart.py.
+# The default CacheCart keeps them in CACHES; the session (still the DB
+# backend) only stores the cart's id, written once when the cart is created.
+# 'core.cart.SessionCart' keeps the lines in the session itself, and
+# 'core.cart.DatabaseCart' keeps signed-in users' carts in CartItem.
+CART_BACKEND = os.getenv('CART_BACKEND', 'core.cart.CacheCart')
+CART_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'